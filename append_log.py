@@ -0,0 +1,156 @@
+# append_log.py
+"""Appends to shared log files that several app processes may write at once.
+
+Writers serialise on an advisory lock held on a sidecar `<path>.lock` file
+(fcntl.flock on POSIX, msvcrt.locking on Windows), and each record goes to
+the file in a single write while the lock is held, so rows from different
+processes never interleave. fsync is batched: at most once per
+`fsync_interval` seconds per log, plus once more shortly after the last write
+and at exit. The file handle is released once writes go quiet, so the log can
+be replaced (see log_compaction.py) even on Windows. Use get_append_log() to
+share one AppendLog per file within a process.
+"""
+import atexit
+import errno
+import os
+import threading
+import time
+
+if os.name == 'nt':
+    import msvcrt
+
+    def _lock(fd, exclusive):
+        # Windows has no shared locks; everyone takes the exclusive one
+        os.lseek(fd, 0, os.SEEK_SET)
+        while True:
+            try:
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                return
+            except OSError as e:
+                # LK_LOCK gives up after ~10 s of retries; keep waiting on
+                # contention, but let any other failure through
+                if e.errno not in (errno.EDEADLOCK, errno.EACCES):
+                    raise
+
+    def _unlock(fd):
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _lock(fd, exclusive):
+        fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+    def _unlock(fd):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+class FileLock:
+    """Inter-process lock for `path`, held on `<path>.lock` for the duration of a with block"""
+
+    def __init__(self, path, exclusive=True):
+        self.lock_path = f"{path}.lock"
+        self.exclusive = exclusive
+        self.fd = None
+
+    def __enter__(self):
+        self.fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            _lock(self.fd, self.exclusive)
+        except BaseException:
+            os.close(self.fd)
+            raise
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            _unlock(self.fd)
+        finally:
+            os.close(self.fd)
+            self.fd = None
+
+
+class AppendLog:
+    """Locked, batched-fsync appends to one file shared between processes"""
+
+    def __init__(self, path, fsync_interval=1.0):
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self.thread_lock = threading.Lock()
+        self.fd = None
+        self.dirty = False
+        self.last_sync = time.monotonic()
+        self.sync_timer = None
+
+    def _current_fd(self):
+        """Descriptor for the file now at `path`, reopening if it was replaced (e.g. compacted)"""
+        if self.fd is not None:
+            try:
+                if os.path.samestat(os.fstat(self.fd), os.stat(self.path)):
+                    return self.fd
+            except FileNotFoundError:
+                pass
+            self._release_locked()
+        self.fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, 'O_BINARY', 0), 0o644)
+        return self.fd
+
+    def append(self, data):
+        """Append `data` (bytes) atomically with respect to other AppendLog writers"""
+        with self.thread_lock, FileLock(self.path):
+            fd = self._current_fd()
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+            self.dirty = True
+
+            if time.monotonic() - self.last_sync >= self.fsync_interval:
+                self._sync_locked()
+            if self.sync_timer is None:
+                # Sync the tail of a burst and release the handle once writes go quiet
+                self.sync_timer = threading.Timer(self.fsync_interval, self.sync)
+                self.sync_timer.daemon = True
+                self.sync_timer.start()
+
+    def _sync_locked(self):
+        if self.dirty and self.fd is not None:
+            os.fsync(self.fd)
+            self.dirty = False
+        self.last_sync = time.monotonic()
+
+    def _release_locked(self):
+        if self.fd is not None:
+            self._sync_locked()
+            os.close(self.fd)
+            self.fd = None
+
+    def sync(self):
+        with self.thread_lock:
+            self.sync_timer = None
+            self._release_locked()
+
+    def close(self):
+        with self.thread_lock:
+            if self.sync_timer is not None:
+                self.sync_timer.cancel()
+                self.sync_timer = None
+            self._release_locked()
+
+
+_logs = {}
+_logs_lock = threading.Lock()
+
+
+def get_append_log(path, **options):
+    """The process-wide AppendLog for `path`, created on first use and closed at exit"""
+    key = os.path.abspath(path)
+    with _logs_lock:
+        if key not in _logs:
+            _logs[key] = AppendLog(path, **options)
+        return _logs[key]
+
+
+@atexit.register
+def _close_logs():
+    with _logs_lock:
+        for log in _logs.values():
+            log.close()
@@ -0,0 +1,170 @@
+# batch_analyzer.py
+"""Offline pose analysis of recorded practice videos.
+
+Example:
+    python batch_analyzer.py classes/*.mp4 --model yoga_pose_neural_network_model.h5 \\
+        --backend numpy --output-dir analysis --workers 16
+"""
+import os
+import argparse
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import cv2
+import mediapipe as mp
+import numpy as np
+import pandas as pd
+
+from pose_classifier import PoseClassifier, extract_landmarks, NUM_FEATURES
+from posture_corrector import get_biomechanical_feedback, compute_joint_angles, JOINT_NAMES
+from inference_resolution import resize_for_inference
+
+LANDMARK_COLUMNS = [f"lm{i}_{axis}" for i in range(NUM_FEATURES // 4) for axis in "xyzv"]
+
+# Per-process state, created once by the pool initializer
+_worker = {}
+
+
+def _init_worker(model_path, backend, inference_resolution):
+    # Keep each process single-threaded inside OpenCV; the pool provides the parallelism
+    cv2.setNumThreads(1)
+    _worker['classifier'] = PoseClassifier(model_path, backend=backend) if model_path else None
+    _worker['inference_resolution'] = inference_resolution
+
+
+def split_video(video_path, chunk_seconds):
+    """Return (video_path, start_frame, end_frame) segments of about chunk_seconds each"""
+    cap = cv2.VideoCapture(str(video_path))
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    cap.release()
+
+    if frame_count <= 0 or not chunk_seconds:
+        return [(str(video_path), 0, None)]
+
+    chunk_frames = max(1, int(chunk_seconds * fps))
+    return [(str(video_path), start, min(start + chunk_frames, frame_count))
+            for start in range(0, frame_count, chunk_frames)]
+
+
+def analyze_segment(video_path, start_frame, end_frame, target_pose=None, stride=1):
+    """Analyse frames [start_frame, end_frame) of one video in the current worker"""
+    classifier = _worker['classifier']
+    resolution = _worker['inference_resolution']
+
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    if start_frame:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+
+    frame_indices, landmark_rows = [], []
+    labels, confidences, feedback = [], [], []
+    frame_index = start_frame
+    # A fresh Pose per segment, so video-mode tracking never carries over from
+    # the end of an unrelated segment or video
+    with mp.solutions.pose.Pose(static_image_mode=False, min_detection_confidence=0.5) as pose:
+        try:
+            while end_frame is None or frame_index < end_frame:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                if (frame_index - start_frame) % stride:
+                    frame_index += 1
+                    continue
+
+                small = resize_for_inference(frame, resolution)
+                results = pose.process(cv2.cvtColor(small, cv2.COLOR_BGR2RGB))
+                landmarks = extract_landmarks(results)
+
+                label, confidence, corrections = None, np.nan, []
+                if results.pose_landmarks:
+                    if classifier:
+                        label, confidence = classifier.classify(landmarks)
+                    pose_for_feedback = target_pose or label
+                    if pose_for_feedback:
+                        corrections = get_biomechanical_feedback(landmarks, pose_for_feedback)
+
+                frame_indices.append(frame_index)
+                landmark_rows.append(landmarks.astype(np.float32))
+                labels.append(label)
+                confidences.append(confidence)
+                feedback.append("; ".join(corrections))
+                frame_index += 1
+        finally:
+            cap.release()
+
+    landmark_array = np.array(landmark_rows, dtype=np.float32).reshape(-1, NUM_FEATURES)
+    df = pd.DataFrame(landmark_array, columns=LANDMARK_COLUMNS)
+    df.insert(0, 'frame', np.array(frame_indices, dtype=np.int32))
+    df.insert(1, 'timestamp', df['frame'] / fps)
+    df['predicted_pose'] = pd.Series(labels, dtype='category')
+    df['confidence'] = np.array(confidences, dtype=np.float32)
+    df['feedback'] = feedback
+
+    # All joint angles for the whole segment in one vectorized call
+    angles = compute_joint_angles(landmark_array.reshape(-1, 33, 4), min_visibility=0.5)
+    for i, name in enumerate(JOINT_NAMES):
+        df[f'angle_{name}'] = angles[:, i].astype(np.float32)
+    return video_path, start_frame, df
+
+
+def analyze_videos(video_paths, output_dir, model_path=None, backend="numpy", workers=None,
+                   chunk_seconds=60, target_pose=None, stride=1, inference_resolution=None):
+    """Analyse videos in parallel and write one Parquet file per video to output_dir"""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    segments = [segment for path in video_paths for segment in split_video(path, chunk_seconds)]
+    remaining = defaultdict(int)
+    for path, _, _ in segments:
+        remaining[path] += 1
+    parts = defaultdict(list)
+    written = []
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(model_path, backend, inference_resolution)) as pool:
+        futures = [pool.submit(analyze_segment, path, start, end, target_pose, stride)
+                   for path, start, end in segments]
+
+        for future in as_completed(futures):
+            path, start, df = future.result()
+            parts[path].append((start, df))
+            remaining[path] -= 1
+            if remaining[path] == 0:
+                # Every segment of this video is done, stitch them in order and write
+                frames = [part for _, part in sorted(parts.pop(path), key=lambda p: p[0])]
+                out_path = output_dir / f"{Path(path).stem}.parquet"
+                pd.concat(frames, ignore_index=True).to_parquet(out_path, index=False)
+                written.append(str(out_path))
+                print(f"Wrote {out_path}")
+
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyse recorded yoga practice videos offline")
+    parser.add_argument("videos", nargs="+", help="Video files to analyse")
+    parser.add_argument("--output-dir", default="analysis")
+    parser.add_argument("--model", help="Path to the pose classifier .h5 model")
+    parser.add_argument("--backend", default="numpy", help="Classifier inference backend")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk-seconds", type=float, default=60,
+                        help="Split long videos into segments of this length (0 disables)")
+    parser.add_argument("--target-pose", help="Score every frame against this pose "
+                                              "instead of the predicted one")
+    parser.add_argument("--stride", type=int, default=1, help="Analyse every Nth frame")
+    parser.add_argument("--inference-resolution", type=int,
+                        help="Long side in pixels for pose detection")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    written = analyze_videos(args.videos, args.output_dir, args.model, args.backend, args.workers,
+                             args.chunk_seconds, args.target_pose, args.stride,
+                             args.inference_resolution)
+    print(f"Analysed {len(written)} videos in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
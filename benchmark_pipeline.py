@@ -0,0 +1,313 @@
+# benchmark_pipeline.py
+"""Per-stage benchmarks for the real-time pose pipeline.
+
+Results are written as JSON so runs on different machines or commits can be
+compared with --compare.
+
+Example:
+    python benchmark_pipeline.py --model model.h5 --video class.mp4 --output bench/studio-a.json
+    python benchmark_pipeline.py --compare bench/studio-a.json --output bench/studio-b.json
+"""
+import argparse
+import json
+import os
+import platform
+import time
+import types
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+from pose_classifier import PoseClassifier, BACKENDS, extract_landmarks
+from posture_corrector import calculate_joint_angle, get_biomechanical_feedback
+from emg_visualizer import draw_muscle_overlay
+from landmark_replay import to_landmark_points
+from landmark_recorder import LandmarkReader
+from hud import HudCompositor
+
+RESOLUTIONS = {'480p': (480, 640), '720p': (720, 1280), '1080p': (1080, 1920)}
+POSES = ["downdog", "goddess", "plank", "tree", "warrior2"]
+
+# Rough standing pose in normalised image coordinates, used when no recording is given
+STANDING_POSE = np.array([
+    [0.50, 0.15], [0.51, 0.13], [0.52, 0.13], [0.53, 0.13], [0.49, 0.13], [0.48, 0.13],
+    [0.47, 0.13], [0.54, 0.14], [0.46, 0.14], [0.51, 0.17], [0.49, 0.17], [0.57, 0.27],
+    [0.43, 0.27], [0.60, 0.38], [0.40, 0.38], [0.61, 0.48], [0.39, 0.48], [0.62, 0.50],
+    [0.38, 0.50], [0.61, 0.50], [0.39, 0.50], [0.60, 0.49], [0.40, 0.49], [0.55, 0.52],
+    [0.45, 0.52], [0.55, 0.70], [0.45, 0.70], [0.55, 0.88], [0.45, 0.88], [0.55, 0.90],
+    [0.45, 0.90], [0.57, 0.92], [0.43, 0.92]
+])
+
+
+def time_call(fn, iterations=200, warmup=10):
+    """Run fn repeatedly and return latency statistics in milliseconds"""
+    for _ in range(warmup):
+        fn()
+
+    timings = np.empty(iterations)
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings[i] = time.perf_counter() - start
+
+    timings *= 1000
+    return {
+        'mean_ms': round(float(timings.mean()), 4),
+        'p50_ms': round(float(np.percentile(timings, 50)), 4),
+        'p95_ms': round(float(np.percentile(timings, 95)), 4),
+        'iterations': iterations
+    }
+
+
+def synthetic_landmarks(count=64, seed=0):
+    """(count, 33, 4) landmark arrays jittered around a standing pose"""
+    rng = np.random.default_rng(seed)
+    landmarks = np.zeros((count, 33, 4), dtype=np.float32)
+    landmarks[:, :, :2] = STANDING_POSE + rng.normal(0, 0.01, (count, 33, 2))
+    landmarks[:, :, 2] = rng.normal(0, 0.1, (count, 33))
+    landmarks[:, :, 3] = rng.uniform(0.8, 1.0, (count, 33))
+    return landmarks
+
+
+def synthetic_frame(shape, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 256, (*shape, 3), dtype=np.uint8)
+
+
+def load_video_frames(path, count=60):
+    cap = cv2.VideoCapture(path)
+    frames = []
+    try:
+        while len(frames) < count:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+    finally:
+        cap.release()
+    return frames
+
+
+class Cycle:
+    """Endless round-robin over samples so each iteration sees a different input"""
+
+    def __init__(self, items):
+        self.items = items
+        self.index = 0
+
+    def next(self):
+        item = self.items[self.index % len(self.items)]
+        self.index += 1
+        return item
+
+
+# ====================== STAGES ======================
+def bench_landmark_stages(landmark_samples, iterations):
+    results = {}
+    point_lists = Cycle([to_landmark_points(lm) for lm in landmark_samples])
+    fake_results = Cycle([types.SimpleNamespace(pose_landmarks=types.SimpleNamespace(landmark=points))
+                          for points in point_lists.items])
+
+    results['extract_landmarks'] = time_call(lambda: extract_landmarks(fake_results.next()), iterations)
+
+    def joint_angle():
+        points = point_lists.next()
+        calculate_joint_angle(points[11], points[23], points[25])
+    results['calculate_joint_angle'] = time_call(joint_angle, iterations)
+
+    for pose_name in POSES:
+        results[f'biomechanical_feedback/{pose_name}'] = time_call(
+            lambda: get_biomechanical_feedback(point_lists.next(), pose_name), iterations)
+    return results
+
+
+def bench_classifier(model_path, backends, landmark_samples, iterations):
+    results = {}
+    flat = Cycle([lm.ravel() for lm in landmark_samples])
+    for backend in backends:
+        try:
+            classifier = PoseClassifier(model_path, backend=backend)
+        except Exception as e:
+            results[f'classifier/{backend}'] = {'error': str(e)}
+            continue
+        results[f'classifier/{backend}'] = time_call(lambda: classifier.classify(flat.next()), iterations)
+    return results
+
+
+def bench_frame_stages(frames_by_resolution, landmark_samples, iterations):
+    results = {}
+    point_lists = Cycle([to_landmark_points(lm) for lm in landmark_samples])
+
+    for resolution, frames in frames_by_resolution.items():
+        frame_cycle = Cycle([cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) for frame in frames])
+        results[f'draw_muscle_overlay/{resolution}'] = time_call(
+            lambda: draw_muscle_overlay(frame_cycle.next(), point_lists.next(), "warrior2"), iterations)
+
+        hud = HudCompositor()
+        lines = [("Target: warrior2", (20, 50), 0.8, (0, 255, 0), 2),
+                 ("Perfect!", (20, 130), 0.8, (0, 255, 0), 2),
+                 ("• Bend front knee to 90 degrees", (20, 210), 0.7, (0, 165, 255), 2)]
+        # Live readings differ from frame to frame
+        live_lines = Cycle([[(f"Detected: warrior2 ({confidence:.1f}%)", (20, 90), 0.8, (0, 255, 0), 2)]
+                            for confidence in np.linspace(85, 95, 97)])
+        results[f'hud_draw/{resolution}'] = time_call(
+            lambda: hud.draw(frame_cycle.next(), lines, live_lines.next()), iterations)
+    return results
+
+
+def bench_heart_rate(frames_by_resolution, iterations):
+    results = {}
+    try:
+        from ppg_processor import HeartRateMonitor, StreamingHeartRateEstimator
+        monitor = HeartRateMonitor()
+    except Exception as e:
+        return {'heart_rate': {'error': str(e)}}
+
+    for resolution, frames in frames_by_resolution.items():
+        frame_cycle = Cycle([cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) for frame in frames])
+        results[f'hr_process_frame/{resolution}'] = time_call(
+            lambda: monitor.process_frame(frame_cycle.next()), iterations)
+
+    results['get_heart_rate'] = time_call(monitor.get_heart_rate, iterations)
+
+    # The estimate itself runs on the worker thread; time it on a standalone estimator
+    # filled with a 72 BPM pulse so it does its full computation
+    estimator = StreamingHeartRateEstimator(monitor.sample_rate, monitor.buffer_size)
+    for value in 100 + np.sin(2 * np.pi * 1.2 * np.arange(monitor.buffer_size) / monitor.sample_rate):
+        estimator.add_sample(value)
+    results['hr_estimate'] = time_call(lambda: estimator.estimate(force=True), iterations)
+    monitor.stop()
+    return results
+
+
+def bench_end_to_end(frames_by_resolution, iterations, model_path=None, backend="numpy"):
+    """Time frame_annotator.process_frame with the app's default session state.
+
+    Without `model_path` the classifier is left out, as in the app when the
+    model fails to load.
+    """
+    try:
+        import mediapipe as mp
+        import frame_annotator
+        pose = mp.solutions.pose.Pose(static_image_mode=False, min_detection_confidence=0.5)
+        model = PoseClassifier(model_path, backend=backend) if model_path else None
+    except Exception as e:
+        return {'process_frame': {'error': str(e)}}
+
+    results = {}
+    for show_extras in (False, True):
+        suffix = "all_overlays" if show_extras else "pose_only"
+        state = frame_annotator.new_state(show_hr=show_extras, show_emg=show_extras)
+        if show_extras:
+            try:
+                from ppg_processor import HeartRateMonitor
+                state.hr_monitor = HeartRateMonitor()
+            except Exception as e:
+                results[f'process_frame/{suffix}'] = {'error': str(e)}
+                continue
+        try:
+            for resolution, frames in frames_by_resolution.items():
+                state.detection_scheduler.reset()
+                frame_cycle = Cycle(frames)
+                results[f'process_frame/{suffix}/{resolution}'] = time_call(
+                    lambda: frame_annotator.process_frame(frame_cycle.next(), "tree", state, pose, model),
+                    iterations)
+        finally:
+            if state.hr_monitor is not None:
+                state.hr_monitor.stop()
+    pose.close()
+    return results
+
+
+# ====================== RUNNER ======================
+def run_suite(args):
+    if args.recording:
+        reader = LandmarkReader(args.recording)
+        step = max(1, len(reader) // 64)
+        landmark_samples = reader.landmarks(slice(0, len(reader), step))
+    else:
+        landmark_samples = synthetic_landmarks()
+
+    if args.video:
+        source = load_video_frames(args.video)
+        frame_source = "recorded"
+    else:
+        source = [synthetic_frame(RESOLUTIONS['1080p'], seed) for seed in range(4)]
+        frame_source = "synthetic"
+    frames_by_resolution = {
+        name: [cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA) for frame in source]
+        for name, (height, width) in RESOLUTIONS.items() if name in args.resolutions
+    }
+
+    results = {}
+    results.update(bench_landmark_stages(landmark_samples, args.iterations))
+    if args.model:
+        results.update(bench_classifier(args.model, args.backends, landmark_samples, args.iterations))
+    results.update(bench_frame_stages(frames_by_resolution, landmark_samples, args.iterations))
+    if not args.skip_heart_rate:
+        results.update(bench_heart_rate(frames_by_resolution, args.iterations))
+    if not args.skip_end_to_end:
+        results.update(bench_end_to_end(frames_by_resolution, args.iterations, args.model,
+                                        args.backends[0]))
+
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'host': platform.node(),
+            'platform': platform.platform(),
+            'processor': platform.processor() or platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'opencv': cv2.__version__,
+            'frame_source': frame_source,
+            'landmark_source': args.recording or "synthetic"
+        },
+        'results': results
+    }
+
+
+def compare(current, previous):
+    print(f"{'stage':<45}{'previous':>12}{'current':>12}{'change':>10}")
+    for stage, stats in current['results'].items():
+        before = previous['results'].get(stage, {})
+        if 'mean_ms' not in stats or 'mean_ms' not in before:
+            continue
+        change = (stats['mean_ms'] / before['mean_ms'] - 1) * 100 if before['mean_ms'] else 0.0
+        print(f"{stage:<45}{before['mean_ms']:>10.3f}ms{stats['mean_ms']:>10.3f}ms{change:>+9.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the real-time pose pipeline stages")
+    parser.add_argument("--model", help="Pose classifier .h5 model (classifier stages are skipped without it)")
+    parser.add_argument("--backends", nargs="+", default=["numpy"], choices=list(BACKENDS))
+    parser.add_argument("--video", help="Recorded video to benchmark on instead of synthetic frames")
+    parser.add_argument("--recording", help="Landmark recording (.ylm) to use instead of synthetic landmarks")
+    parser.add_argument("--resolutions", nargs="+", default=list(RESOLUTIONS), choices=list(RESOLUTIONS))
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--skip-heart-rate", action="store_true")
+    parser.add_argument("--skip-end-to-end", action="store_true")
+    parser.add_argument("--output", default=f"bench/{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    parser.add_argument("--compare", help="Previous results JSON to compare against")
+    args = parser.parse_args()
+
+    report = run_suite(args)
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for stage, stats in report['results'].items():
+        if 'error' in stats:
+            print(f"{stage:<45}unavailable ({stats['error']})")
+        else:
+            print(f"{stage:<45}mean {stats['mean_ms']:>9.3f} ms  p95 {stats['p95_ms']:>9.3f} ms")
+    print(f"Saved results to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# detection_scheduler.py
+import cv2
+import numpy as np
+
+
+class DetectionScheduler:
+    """Decides when full landmark detection and pose evaluation are worth running.
+
+    Detection runs every `detect_interval` frames, or earlier when a cheap
+    frame-difference score on a small grayscale thumbnail exceeds
+    `motion_threshold`. In between, the last landmarks are reused. Classification
+    and biomechanical feedback are only recomputed once the landmarks have moved
+    more than `landmark_tolerance` (normalised image units) since the last evaluation.
+    """
+
+    def __init__(self, detect_interval=5, motion_threshold=6.0,
+                 landmark_tolerance=0.015, thumbnail_size=(64, 48)):
+        self.detect_interval = detect_interval
+        self.motion_threshold = motion_threshold
+        self.landmark_tolerance = landmark_tolerance
+        self.thumbnail_size = thumbnail_size
+
+        self.frames_since_detection = 0
+        self.reference_thumbnail = None
+        self.last_results = None
+        self.last_eval_landmarks = None
+        self.last_eval_target = None
+        self.cached_evaluation = None
+
+    def motion_score(self, frame):
+        """Mean absolute grey-level change against the frame of the last detection"""
+        thumbnail = cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY),
+                               self.thumbnail_size, interpolation=cv2.INTER_AREA)
+        if self.reference_thumbnail is None:
+            return float('inf'), thumbnail
+        return float(cv2.absdiff(thumbnail, self.reference_thumbnail).mean()), thumbnail
+
+    def should_detect(self, frame):
+        score, thumbnail = self.motion_score(frame)
+        if (self.last_results is None
+                or self.frames_since_detection + 1 >= self.detect_interval
+                or score > self.motion_threshold):
+            self.reference_thumbnail = thumbnail
+            self.frames_since_detection = 0
+            return True
+
+        self.frames_since_detection += 1
+        return False
+
+    def update_results(self, results):
+        self.last_results = results
+
+    def should_evaluate(self, landmarks, target_pose):
+        """True when the flattened (132,) landmarks moved enough to re-run the classifier"""
+        if self.cached_evaluation is None or target_pose != self.last_eval_target:
+            return True
+        coords = landmarks.reshape(-1, 4)[:, :2]
+        previous = self.last_eval_landmarks.reshape(-1, 4)[:, :2]
+        return np.abs(coords - previous).max() > self.landmark_tolerance
+
+    def cache_evaluation(self, landmarks, target_pose, evaluation):
+        self.last_eval_landmarks = landmarks.copy()
+        self.last_eval_target = target_pose
+        self.cached_evaluation = evaluation
+
+    def reset(self):
+        self.frames_since_detection = 0
+        self.reference_thumbnail = None
+        self.last_results = None
+        self.last_eval_landmarks = None
+        self.last_eval_target = None
+        self.cached_evaluation = None
@@ -1,6 +1,5 @@
 import cv2
 import numpy as np
-import mediapipe as mp
 
 MUSCLE_GROUPS = {
     'core': [23, 24, 11, 12],
@@ -20,23 +19,57 @@ POSE_MUSCLES = {
 }
 
 
+ARM_MUSCLES = {'shoulders', 'biceps', 'triceps'}
+
+
+def _compile_pose_polygons():
+    """Per pose: [(landmark index array, color)] for each drawable muscle polygon"""
+    polygons = {}
+    for pose_name, muscles in POSE_MUSCLES.items():
+        polygons[pose_name] = [
+            (np.array(MUSCLE_GROUPS[muscle]),
+             (0, 0, 255) if muscle in ARM_MUSCLES else (255, 0, 0))
+            for muscle in muscles if len(MUSCLE_GROUPS[muscle]) >= 3
+        ]
+    return polygons
+
+
+POSE_POLYGONS = _compile_pose_polygons()
+
+
+def landmarks_to_pixels(landmarks, width, height):
+    """(33, 2) int32 pixel coordinates from MediaPipe landmarks or a (33, 4)/(132,) array"""
+    if isinstance(landmarks, np.ndarray):
+        xy = landmarks.reshape(-1, 4)[:, :2]
+    else:
+        xy = np.array([(lm.x, lm.y) for lm in landmarks])
+    return (xy * (width, height)).astype(np.int32)
+
+
 def draw_muscle_overlay(image, landmarks, pose_name, alpha=0.4):
-    """Draw semi-transparent muscle engagement visualization"""
-    overlay = image.copy()
+    """Draw semi-transparent muscle engagement visualization onto image in place.
+
+    Only the bounding box of the muscle polygons is copied and blended, so the
+    cost scales with the overlay area rather than the frame size.
+    """
+    polygons = POSE_POLYGONS.get(pose_name)
+    if not polygons:
+        return image
+
     height, width = image.shape[:2]
+    pixels = landmarks_to_pixels(landmarks, width, height)
+    points = [pixels[indices] for indices, _ in polygons]
+
+    corners = np.concatenate(points)
+    x1, y1 = np.maximum(corners.min(axis=0), 0)
+    x2, y2 = np.minimum(corners.max(axis=0) + 1, (width, height))
+    if x1 >= x2 or y1 >= y2:
+        return image
+
+    region = image[y1:y2, x1:x2]
+    overlay = region.copy()
+    for polygon, (_, color) in zip(points, polygons):
+        cv2.fillPoly(overlay, [polygon], color, offset=(-int(x1), -int(y1)))
 
-    if pose_name in POSE_MUSCLES:
-        engaged_muscles = POSE_MUSCLES[pose_name]
-        for muscle in engaged_muscles:
-            points = []
-            for idx in MUSCLE_GROUPS[muscle]:
-                landmark = landmarks[idx]
-                x = int(landmark.x * width)
-                y = int(landmark.y * height)
-                points.append((x, y))
-
-            if len(points) >= 3:
-                color = (0, 0, 255) if muscle in ['shoulders', 'biceps', 'triceps'] else (255, 0, 0)
-                cv2.fillPoly(overlay, [np.array(points)], color)
-
-    return cv2.addWeighted(overlay, alpha, image, 1 - alpha, 0)
\ No newline at end of file
+    cv2.addWeighted(overlay, alpha, region, 1 - alpha, 0, dst=region)
+    return image
@@ -2,20 +2,84 @@
 import streamlit as st
 import pandas as pd
 from urllib.parse import quote
+import csv
+import io
 import os
 from datetime import datetime
 
+from append_log import FileLock, get_append_log
+from log_compaction import manifest_version, read_cold, start_compactor
+
+
+FEEDBACK_COLUMNS = ['timestamp', 'user', 'pose', 'rating', 'comments', 'email_initiated']
+# Older files name a column differently; it is renamed when the file is opened
+RENAMED_COLUMNS = {'email_sent': 'email_initiated'}
+
+
+def typed_feedback(df):
+    """Convert a DataFrame of feedback rows read as strings to the stored types"""
+    df['rating'] = pd.to_numeric(df['rating'], errors='coerce')
+    df['email_initiated'] = df['email_initiated'].astype(str) == 'True'
+    return df
+
 
 class FeedbackSystem:
-    def __init__(self):
-        self.feedback_file = "feedback_history.csv"
+    """Feedback log made of a hot CSV tail and compacted month-partitioned Parquet.
+
+    Rows are appended to the CSV through the process's shared AppendLog, so
+    several app processes can record feedback into the same file without
+    interleaving rows. A
+    background LogCompactor moves older rows into `cold_dir` once the CSV
+    outgrows `max_hot_bytes`, and reads combine both transparently.
+
+    The CSV is validated (and migrated to the current columns) on open. Reads
+    are served from an in-process per-user index; when the file has grown since
+    the last read only the appended bytes are parsed, and any other change to
+    it, or a new compaction, triggers a full reload. Cold rows are read per
+    user with a Parquet filter and cached until the next compaction.
+    """
+
+    def __init__(self, feedback_file="feedback_history.csv", cold_dir="data/feedback_archive",
+                 max_hot_bytes=1 << 20, hot_rows=500, compact_interval=600):
+        self.feedback_file = feedback_file
+        self.cold_dir = cold_dir
         self._initialize_storage()
+        self.log = get_append_log(feedback_file)
+        self.compactor = start_compactor(feedback_file, cold_dir, interval=compact_interval,
+                                         max_hot_bytes=max_hot_bytes, hot_rows=hot_rows,
+                                         convert=typed_feedback)
+        self._index = {}  # user -> list of rows
+        self._frames = {}  # user -> cached DataFrame of that user's hot and cold rows
+        self._offset = 0  # bytes of the file already indexed
+        self._stat = None  # (size, mtime_ns) when the index was last refreshed
+        self._cold_version = None  # manifest_version() the cache was built against
 
     def _initialize_storage(self):
-        if not os.path.exists(self.feedback_file):
-            pd.DataFrame(columns=[
-                'timestamp', 'user', 'pose', 'rating', 'comments', 'email_initiated'
-            ]).to_csv(self.feedback_file, index=False)
+        # Another process may be creating or migrating the file at the same time
+        with FileLock(self.feedback_file):
+            if not os.path.exists(self.feedback_file) or os.path.getsize(self.feedback_file) == 0:
+                with open(self.feedback_file, "w", newline="") as f:
+                    csv.writer(f, lineterminator="\n").writerow(FEEDBACK_COLUMNS)
+                return
+
+            with open(self.feedback_file, "r", newline="") as f:
+                header = next(csv.reader(f), [])
+            if header != FEEDBACK_COLUMNS:
+                self._migrate(header)
+
+    def _migrate(self, header):
+        columns = [RENAMED_COLUMNS.get(column, column) for column in header]
+        missing = set(FEEDBACK_COLUMNS) - set(columns)
+        if missing - {'email_initiated'}:
+            raise ValueError(f"{self.feedback_file} is missing columns {sorted(missing)}")
+
+        df = pd.read_csv(self.feedback_file, dtype=str, keep_default_na=False)
+        df.columns = columns
+        if 'email_initiated' in missing:
+            df['email_initiated'] = 'False'
+        temp_path = self.feedback_file + ".migrating"
+        df[FEEDBACK_COLUMNS].to_csv(temp_path, index=False, lineterminator="\n")
+        os.replace(temp_path, self.feedback_file)
 
     def save_feedback(self, user_name, pose, rating, comments):
         new_entry = pd.DataFrame([{
@@ -27,16 +91,71 @@ class FeedbackSystem:
             'email_initiated': False
         }])
 
-        new_entry.to_csv(self.feedback_file, mode='a', header=False, index=False)
+        # The appended row changes the file's size and mtime, which the next read picks up
+        row = new_entry.to_csv(header=False, index=False, lineterminator="\n")
+        self.log.append(row.encode("utf-8"))
         return new_entry
 
+    def _refresh(self):
+        with open(self.feedback_file, "rb") as f:
+            # Stat the open handle so the identity checked is the file actually read
+            stat = os.fstat(f.fileno())
+            identity = (stat.st_dev, stat.st_ino)
+            key = (identity, stat.st_size, stat.st_mtime_ns)
+
+            # Compaction publishes the manifest before replacing the hot file, so
+            # checking it after opening never pairs a new hot file with an old manifest
+            cold_version = manifest_version(self.cold_dir)
+            if cold_version != self._cold_version:
+                # A compaction moved rows into new cold segments
+                self._cold_version = cold_version
+                self._stat = None
+
+            if key == self._stat:
+                return
+
+            if self._stat is None or identity != self._stat[0] or stat.st_size < self._offset:
+                # First read, or the file was replaced or truncated: index it from scratch
+                self._index, self._frames, self._offset = {}, {}, 0
+
+            f.seek(self._offset)
+            data = f.read()
+        # Only index complete lines; a concurrent writer may be mid-row
+        complete = data[:data.rfind(b"\n") + 1]
+        rows = csv.reader(io.StringIO(complete.decode("utf-8"), newline=""))
+        if self._offset == 0:
+            next(rows, None)  # header
+
+        for row in rows:
+            if len(row) != len(FEEDBACK_COLUMNS):
+                continue
+            record = dict(zip(FEEDBACK_COLUMNS, row))
+            self._index.setdefault(record['user'], []).append(record)
+            self._frames.pop(record['user'], None)
+
+        self._offset += len(complete)
+        self._stat = key
+
     def get_feedback_history(self, user_name):
         try:
-            df = pd.read_csv(self.feedback_file)
-            return df[df['user'] == user_name]
-        except:
+            self._refresh()
+        except (OSError, UnicodeDecodeError):
             return pd.DataFrame()
 
+        if user_name not in self._frames:
+            hot = typed_feedback(pd.DataFrame(self._index.get(user_name, []), columns=FEEDBACK_COLUMNS))
+            if self._cold_version is not None:
+                try:
+                    cold = read_cold(self.cold_dir, columns=FEEDBACK_COLUMNS,
+                                     filters=[('user', '==', user_name)])
+                except Exception:
+                    # A missing or unreadable cold segment should not hide the hot rows;
+                    # leave them uncached so the cold read is retried next time
+                    return hot if len(hot) else pd.DataFrame()
+                hot = pd.concat([cold, hot], ignore_index=True) if len(hot) else cold
+            self._frames[user_name] = hot if len(hot) else pd.DataFrame()
+        return self._frames[user_name]
+
 
 def show_feedback_ui(target_pose):
     with st.form("feedback_form"):
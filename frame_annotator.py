@@ -0,0 +1,170 @@
+# frame_annotator.py
+"""Per-frame analysis and drawing for the live session, independent of Streamlit"""
+import types
+
+import cv2
+import mediapipe as mp
+
+from posture_corrector import get_biomechanical_feedback
+from emg_visualizer import draw_muscle_overlay
+from detection_scheduler import DetectionScheduler
+from latency_profiler import LatencyProfiler
+from hold_stability import HoldTracker
+from hud import HudCompositor
+from inference_resolution import resize_for_inference
+from pose_classifier import extract_landmarks
+
+mp_pose = mp.solutions.pose
+mp_drawing = mp.solutions.drawing_utils
+LANDMARK_SPEC = mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=2)
+CONNECTION_SPEC = mp_drawing.DrawingSpec(color=(255, 0, 0), thickness=2)
+
+
+def new_state(**overrides):
+    """Fresh per-session state with the app's defaults, for use outside Streamlit"""
+    state = types.SimpleNamespace(
+        show_hr=False,
+        show_emg=False,
+        emg_opacity=0.4,
+        hr_monitor=None,
+        adaptive_detection=True,
+        detection_scheduler=DetectionScheduler(),
+        inference_resolution=None,
+        profiler=LatencyProfiler(enabled=False),
+        landmark_recorder=None,
+        session_timeseries=None,
+        hold_tracker=HoldTracker(),
+        hud=HudCompositor()
+    )
+    for name, value in overrides.items():
+        setattr(state, name, value)
+    return state
+
+
+def get_pose_feedback(predicted_pose, target_pose, confidence):
+    if confidence < 70:
+        return "No pose detected", (255, 0, 0)
+    elif predicted_pose != target_pose:
+        return f"Adjust to {target_pose}", (255, 165, 0)
+    elif confidence < 85:
+        return "Good form!", (255, 255, 0)
+    else:
+        return "Perfect!", (0, 255, 0)
+
+
+def process_frame(frame, target_pose, state, pose, model, captured_at=None):
+    profiler = state.profiler
+    with profiler.span("process_frame"):
+        annotated_image = annotate_frame(frame, target_pose, state, pose, model, captured_at)
+    profiler.mark_frame()
+    return annotated_image
+
+
+def annotate_frame(frame, target_pose, state, pose, model, captured_at=None):
+    """Run detection, classification and feedback on a BGR frame and return it annotated in RGB.
+
+    `state` holds the per-session components and settings (in the app this is
+    st.session_state; see new_state() for the attributes used). `pose` is a
+    MediaPipe Pose instance and `model` a PoseClassifier or None.
+    """
+    profiler = state.profiler
+    # Detection runs on a downscaled copy; overlays are drawn on the full-resolution
+    # frame, which is fine because MediaPipe landmarks are normalised to image size
+    with profiler.span("color_convert"):
+        annotated_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    with profiler.span("resize"):
+        small_frame = resize_for_inference(frame, state.inference_resolution)
+    scheduler = state.detection_scheduler
+    if not state.adaptive_detection or scheduler.should_detect(small_frame):
+        with profiler.span("pose_process"):
+            if small_frame is frame:
+                results = pose.process(annotated_image)
+            else:
+                results = pose.process(cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB))
+        scheduler.update_results(results)
+    else:
+        results = scheduler.last_results
+
+    # On-frame text is collected here and composited once at the end; readings
+    # that change every frame skip the sprite cache
+    hud_lines = []
+    live_lines = []
+    timeseries_values = {}
+
+    if state.show_hr:
+        with profiler.span("hr_monitor"):
+            annotated_image = state.hr_monitor.process_frame(annotated_image, captured_at)
+            hr = state.hr_monitor.get_heart_rate()
+            quality = state.hr_monitor.signal_quality
+        live_lines.append((f"Heart Rate: {hr} BPM (SQI {quality:.2f})",
+                           (annotated_image.shape[1] - 250, 30), 0.7, (0, 255, 255), 2))
+        state.current_hr = hr
+        state.current_hr_quality = quality
+        if state.hr_monitor.has_estimate:
+            # Until then the displayed rate is a placeholder, not a measurement
+            timeseries_values.update(heart_rate=hr, hr_quality=quality)
+
+    if results.pose_landmarks:
+        landmarks = extract_landmarks(results)
+        if state.show_emg:
+            with profiler.span("emg_overlay"):
+                annotated_image = draw_muscle_overlay(
+                    annotated_image,
+                    landmarks,
+                    target_pose.lower(),
+                    alpha=state.emg_opacity
+                )
+
+        with profiler.span("draw_landmarks"):
+            mp_drawing.draw_landmarks(
+                annotated_image,
+                results.pose_landmarks,
+                mp_pose.POSE_CONNECTIONS,
+                landmark_drawing_spec=LANDMARK_SPEC,
+                connection_drawing_spec=CONNECTION_SPEC
+            )
+
+        if landmarks.sum() != 0 and model:
+            if not state.adaptive_detection or scheduler.should_evaluate(landmarks, target_pose):
+                with profiler.span("classifier"):
+                    predicted_pose, confidence = model.classify(landmarks)
+                with profiler.span("biomechanics"):
+                    biomech_feedback = get_biomechanical_feedback(landmarks, target_pose.lower())
+                scheduler.cache_evaluation(landmarks, target_pose,
+                                           (predicted_pose, confidence, biomech_feedback))
+            else:
+                predicted_pose, confidence, biomech_feedback = scheduler.cached_evaluation
+
+            timeseries_values.update(landmarks=landmarks, label=predicted_pose, confidence=confidence)
+            if state.landmark_recorder:
+                state.landmark_recorder.record(landmarks, label=predicted_pose, confidence=confidence)
+
+            hold_tracker = state.hold_tracker
+            hold_tracker.update(landmarks, target_pose,
+                                on_target=predicted_pose == target_pose and confidence >= 70)
+
+            feedback, color = get_pose_feedback(predicted_pose, target_pose, confidence)
+
+            hud_lines.append((f"Target: {target_pose}", (20, 50), 0.8, color, 2))
+            live_lines.append((f"Detected: {predicted_pose} ({confidence:.1f}%)", (20, 90), 0.8, color, 2))
+            hud_lines.append((feedback, (20, 130), 0.8, color, 2))
+            live_lines.append((f"Form: {hold_tracker.form_score:.0f}/100  Hold: {hold_tracker.hold_duration:.0f}s",
+                               (20, 170), 0.8, color, 2))
+
+            y_position = 230
+            for correction in biomech_feedback:
+                hud_lines.append(("• " + correction, (20, y_position), 0.7, (0, 165, 255), 2))
+                y_position += 30
+
+    else:
+        state.hold_tracker.miss()
+        hud_lines.append(("No person detected", (20, 50), 0.8, (255, 0, 0), 2))
+
+    with profiler.span("put_text"):
+        state.hud.draw(annotated_image, hud_lines, live_lines)
+
+    if state.session_timeseries:
+        with profiler.span("timeseries"):
+            state.session_timeseries.update(**timeseries_values)
+
+    return annotated_image
@@ -0,0 +1,95 @@
+# frame_pipeline.py
+import threading
+import time
+from queue import Queue, Empty, Full
+
+
+class LatestQueue:
+    """Bounded queue that drops the oldest item instead of blocking the producer"""
+
+    def __init__(self, maxsize=1):
+        self.queue = Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def put(self, item):
+        while True:
+            try:
+                self.queue.put_nowait(item)
+                return
+            except Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except Empty:
+                    pass
+
+    def get(self, timeout=None):
+        return self.queue.get(timeout=timeout)
+
+
+class FramePipeline:
+    """Runs capture and inference on their own threads so a slow stage never stalls the other.
+
+    The capture thread keeps only the newest frame, the inference thread processes
+    whatever frame is newest when it becomes free, and the caller renders the latest
+    result. Stale frames and results are dropped rather than queued up as latency.
+    `process_fn(frame, captured_at)` receives the monotonic capture time of the frame.
+    """
+
+    def __init__(self, capture, process_fn, queue_size=1):
+        self.capture = capture
+        self.process_fn = process_fn
+        self.frames = LatestQueue(queue_size)
+        self.results = LatestQueue(queue_size)
+        self.stop_event = threading.Event()
+        self.error = None
+        self.threads = [
+            threading.Thread(target=self._capture_loop, name="capture", daemon=True),
+            threading.Thread(target=self._inference_loop, name="inference", daemon=True)
+        ]
+
+    @property
+    def running(self):
+        return not self.stop_event.is_set()
+
+    @property
+    def dropped_frames(self):
+        return self.frames.dropped + self.results.dropped
+
+    def start(self):
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        for thread in self.threads:
+            if thread.is_alive() and thread is not threading.current_thread():
+                thread.join(timeout=1.0)
+
+    def latest_result(self, timeout=0.1):
+        try:
+            return self.results.get(timeout=timeout)
+        except Empty:
+            return None
+
+    def _capture_loop(self):
+        while self.running:
+            ret, frame = self.capture.read()
+            if not ret:
+                self.error = "Failed to access webcam"
+                self.stop_event.set()
+                break
+            self.frames.put((frame, time.monotonic()))
+
+    def _inference_loop(self):
+        while self.running:
+            try:
+                frame, captured_at = self.frames.get(timeout=0.1)
+            except Empty:
+                continue
+            try:
+                self.results.put(self.process_fn(frame, captured_at))
+            except Exception as e:
+                self.error = f"Frame processing failed: {str(e)}"
+                self.stop_event.set()
@@ -4,6 +4,18 @@ from datetime import datetime, timedelta
 import random
 from pathlib import Path
 
+from leaderboard import Leaderboard
+
+_leaderboard = None
+
+
+def get_leaderboard():
+    """Process-wide shared Leaderboard, opened on first use"""
+    global _leaderboard
+    if _leaderboard is None:
+        _leaderboard = Leaderboard()
+    return _leaderboard
+
 
 class YogaGamification:
     def __init__(self, user_id):
@@ -138,15 +150,10 @@ class YogaGamification:
             return unlocked
         return None
 
-    def update_leaderboard(self, global_leaderboard):
-        # This would interface with a database in production
-        global_leaderboard.append({
-            "user": self.user_id,
-            "level": self.data["level"],
-            "points": self.data["points"]
-        })
-        sorted_leaderboard = sorted(global_leaderboard,
-                                    key=lambda x: (-x["level"], -x["points"]))
-        self.data["leaderboard_position"] = sorted_leaderboard.index(
-            next(u for u in sorted_leaderboard if u["user"] == self.user_id)) + 1
-        return sorted_leaderboard[:10]
\ No newline at end of file
+    def update_leaderboard(self, leaderboard=None):
+        """Upsert this user's standing and return the top 10 as dicts of user, level and points"""
+        if leaderboard is None:
+            leaderboard = get_leaderboard()
+        leaderboard.upsert(self.user_id, self.data["level"], self.data["points"])
+        self.data["leaderboard_position"] = leaderboard.rank(self.user_id)
+        return leaderboard.top(10)
@@ -0,0 +1,164 @@
+# hold_stability.py
+import time
+
+import numpy as np
+
+from posture_corrector import COMPILED_RULES, compute_joint_angles, JOINT_NAMES
+
+
+class RollingStats:
+    """Running mean/variance of a vector over the last `window` samples, O(1) per push.
+
+    NaN entries (e.g. occluded joints) are excluded per component. Sums are
+    rebuilt from the buffer once per window to stop floating-point drift, which
+    keeps the amortised cost constant.
+    """
+
+    def __init__(self, window, size):
+        self.window = window
+        self.values = np.zeros((window, size))
+        self.valid = np.zeros((window, size), dtype=bool)
+        self.total = np.zeros(size)
+        self.total_sq = np.zeros(size)
+        self.counts = np.zeros(size, dtype=np.int64)
+        self.position = 0
+        self.filled = 0
+
+    def push(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        valid = ~np.isnan(values)
+        values = np.where(valid, values, 0.0)
+
+        old, old_valid = self.values[self.position], self.valid[self.position]
+        self.total += values - old
+        self.total_sq += values * values - old * old
+        self.counts += valid.astype(np.int64) - old_valid
+
+        self.values[self.position] = values
+        self.valid[self.position] = valid
+        self.position = (self.position + 1) % self.window
+        self.filled = min(self.filled + 1, self.window)
+
+        if self.position == 0:
+            self.total = self.values.sum(axis=0)
+            self.total_sq = (self.values * self.values).sum(axis=0)
+
+    @property
+    def mean(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.counts > 0, self.total / self.counts, np.nan)
+
+    @property
+    def variance(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = self.total / self.counts
+            variance = self.total_sq / self.counts - mean * mean
+        return np.where(self.counts > 1, np.maximum(variance, 0.0), np.nan)
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+    def reset(self):
+        self.__init__(self.window, self.values.shape[1])
+
+
+class HoldTracker:
+    """Live hold-stability and form score for the current target pose.
+
+    Per frame it pushes every joint angle into a RollingStats window and tracks
+    whether all of the pose's biomechanical rules pass. The live form score
+    blends the fraction of the window spent in range with steadiness (how little
+    the joint angles wobble). Session-level totals are kept for the summary.
+    A hold ends on a frame without a detected pose (see miss()) or when more
+    than `max_gap` seconds pass between frames.
+    """
+
+    def __init__(self, window=90, steady_std=8.0, range_weight=0.7, max_gap=1.0):
+        self.window = window
+        self.max_gap = max_gap
+        self.steady_std = steady_std
+        self.range_weight = range_weight
+        self.angle_stats = RollingStats(window, len(JOINT_NAMES))
+        self.in_range_stats = RollingStats(window, 1)
+        self.reset()
+
+    def reset(self):
+        self.angle_stats.reset()
+        self.in_range_stats.reset()
+        self.target_pose = None
+        self.hold_start = None
+        self.last_timestamp = None
+        self.longest_hold = 0.0
+        self.session_frames = 0
+        self.session_in_range = 0
+        self.session_score_total = 0.0
+        self.scored_frames = 0
+
+    def update(self, landmarks, target_pose, on_target, timestamp=None):
+        """Feed one frame of (33, 4) or flat landmarks; on_target means the pose is recognised"""
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        if self.last_timestamp is not None and timestamp - self.last_timestamp > self.max_gap:
+            self.hold_start = None
+        self.last_timestamp = timestamp
+        landmarks = np.asarray(landmarks).reshape(33, 4)
+
+        if target_pose != self.target_pose:
+            self.angle_stats.reset()
+            self.in_range_stats.reset()
+            self.target_pose = target_pose
+            self.hold_start = None
+
+        rules = COMPILED_RULES.get(target_pose)
+        in_range = on_target and (rules is None or not rules.failed_rules(landmarks).any())
+        self.angle_stats.push(compute_joint_angles(landmarks, min_visibility=0.5))
+        self.in_range_stats.push([float(in_range)])
+
+        self.session_frames += 1
+        self.session_in_range += int(in_range)
+
+        if on_target:
+            if self.hold_start is None:
+                self.hold_start = timestamp
+            self.longest_hold = max(self.longest_hold, timestamp - self.hold_start)
+            self.session_score_total += self.form_score
+            self.scored_frames += 1
+        else:
+            self.hold_start = None
+
+    def miss(self, timestamp=None):
+        """Record a frame in which no pose was detected, ending any hold"""
+        self.last_timestamp = time.monotonic() if timestamp is None else timestamp
+        self.hold_start = None
+
+    @property
+    def hold_duration(self):
+        return 0.0 if self.hold_start is None else self.last_timestamp - self.hold_start
+
+    @property
+    def time_in_range(self):
+        """Fraction of the rolling window in which every rule passed"""
+        fraction = self.in_range_stats.mean[0]
+        return 0.0 if np.isnan(fraction) else float(fraction)
+
+    @property
+    def steadiness(self):
+        """1.0 when joint angles are perfectly still, 0.0 at `steady_std` degrees of wobble"""
+        std = self.angle_stats.std
+        if np.all(np.isnan(std)):
+            return 0.0
+        return float(np.clip(1 - np.nanmean(std) / self.steady_std, 0.0, 1.0))
+
+    @property
+    def form_score(self):
+        return round(100 * (self.range_weight * self.time_in_range
+                            + (1 - self.range_weight) * self.steadiness), 1)
+
+    def summary(self):
+        return {
+            'form_score': round(self.session_score_total / self.scored_frames, 1)
+            if self.scored_frames else None,
+            'longest_hold': round(self.longest_hold, 1),
+            'time_in_range': round(self.session_in_range / self.session_frames, 3)
+            if self.session_frames else None
+        }
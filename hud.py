@@ -0,0 +1,76 @@
+# hud.py
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+
+class LRUCache(OrderedDict):
+    def __init__(self, max_size):
+        super().__init__()
+        self.max_size = max_size
+
+    def get_or_create(self, key, factory):
+        if key in self:
+            self.move_to_end(key)
+            return self[key]
+        value = self[key] = factory()
+        if len(self) > self.max_size:
+            self.popitem(last=False)
+        return value
+
+
+class HudCompositor:
+    """Draws on-frame text from cached sprites instead of calling cv2.putText per line.
+
+    Each line is (text, (x, y), font_scale, color, thickness) with the same
+    meaning as cv2.putText. A stable line is rasterised once into a sprite
+    holding its premultiplied colour and inverse coverage; afterwards drawing it
+    is two saturating cv2 ops over the sprite's box, instead of re-rasterising
+    every glyph. Results match cv2.putText to within one intensity level.
+
+    Building a sprite costs about three putText calls, so lines whose text
+    changes most frames (live readings) are passed as `live_lines` and drawn
+    with cv2.putText directly.
+    """
+
+    def __init__(self, max_sprites=256):
+        self.sprites = LRUCache(max_sprites)
+
+    def _render_sprite(self, text, scale, color, thickness):
+        """(premultiplied colour, inverse alpha, offset of the top-left from the text origin)"""
+        (width, height), baseline = cv2.getTextSize(text, FONT, scale, thickness)
+        pad = thickness + 1
+        alpha = np.zeros((height + baseline + 2 * pad, width + 2 * pad), dtype=np.uint8)
+        cv2.putText(alpha, text, (pad, pad + height), FONT, scale, 255, thickness)
+
+        alpha = cv2.merge([alpha] * 3)
+        premultiplied = cv2.multiply(alpha, np.full_like(alpha, color), scale=1 / 255)
+        return premultiplied, cv2.bitwise_not(alpha), (-pad, -pad - height)
+
+    def draw(self, image, lines, live_lines=()):
+        """Composite `lines` from the sprite cache and put `live_lines` directly, in place"""
+        height, width = image.shape[:2]
+        for text, (x, y), scale, color, thickness in lines:
+            premultiplied, inverse_alpha, (dx, dy) = self.sprites.get_or_create(
+                (text, scale, tuple(color), thickness),
+                lambda: self._render_sprite(text, scale, color, thickness))
+
+            # Clip the sprite box to the image
+            left, top = x + dx, y + dy
+            x1, y1 = max(left, 0), max(top, 0)
+            x2 = min(left + premultiplied.shape[1], width)
+            y2 = min(top + premultiplied.shape[0], height)
+            if x1 >= x2 or y1 >= y2:
+                continue
+            sprite = (slice(y1 - top, y2 - top), slice(x1 - left, x2 - left))
+
+            region = image[y1:y2, x1:x2]
+            cv2.multiply(region, inverse_alpha[sprite], dst=region, scale=1 / 255)
+            cv2.add(region, premultiplied[sprite], dst=region)
+
+        for text, origin, scale, color, thickness in live_lines:
+            cv2.putText(image, text, origin, FONT, scale, color, thickness)
+        return image
@@ -0,0 +1,78 @@
+# inference_resolution.py
+import json
+import time
+import platform
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+RESOLUTION_CHOICES = [256, 320, 480, 640]
+DEVICE_PROFILE_PATH = Path("data/device_profile.json")
+
+
+def resize_for_inference(frame, long_side):
+    """Downscale a frame so its longer edge is `long_side` pixels.
+
+    The aspect ratio is preserved, so the normalised landmarks MediaPipe returns
+    for the small image map directly onto the full-resolution frame
+    (x_px = x * full_width, y_px = y * full_height). Frames that are already
+    small enough, or a `long_side` of None, are returned unchanged.
+    """
+    if not long_side:
+        return frame
+
+    height, width = frame.shape[:2]
+    scale = long_side / max(height, width)
+    if scale >= 1:
+        return frame
+    return cv2.resize(frame, (round(width * scale), round(height * scale)),
+                      interpolation=cv2.INTER_AREA)
+
+
+def measure_latency(detect_fn, frame, long_side, trials=5):
+    """Median milliseconds for resize + colour conversion + detection at one resolution"""
+    timings = []
+    for _ in range(trials):
+        start = time.perf_counter()
+        small = resize_for_inference(frame, long_side)
+        detect_fn(cv2.cvtColor(small, cv2.COLOR_BGR2RGB))
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def auto_pick_resolution(detect_fn, frame, budget_ms=25.0, candidates=RESOLUTION_CHOICES):
+    """Pick the largest inference resolution whose detection latency fits the budget"""
+    timings = {}
+    choice = min(candidates)
+    for long_side in sorted(candidates):
+        timings[long_side] = measure_latency(detect_fn, frame, long_side)
+        if timings[long_side] > budget_ms:
+            break
+        choice = long_side
+    return choice, timings
+
+
+def load_device_resolution():
+    """Return the resolution previously picked on this machine, if any"""
+    try:
+        with open(DEVICE_PROFILE_PATH, "r") as f:
+            return json.load(f).get(platform.node(), {}).get("inference_resolution")
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def save_device_resolution(long_side, timings):
+    try:
+        with open(DEVICE_PROFILE_PATH, "r") as f:
+            profiles = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        profiles = {}
+
+    profiles[platform.node()] = {
+        "inference_resolution": long_side,
+        "latency_ms": {str(k): round(v, 2) for k, v in timings.items()}
+    }
+    DEVICE_PROFILE_PATH.parent.mkdir(exist_ok=True, parents=True)
+    with open(DEVICE_PROFILE_PATH, "w") as f:
+        json.dump(profiles, f, indent=2)
@@ -0,0 +1,180 @@
+# landmark_recorder.py
+"""Compact append-only recording of pose landmark streams.
+
+File layout:
+    b"YLMK" | uint32 header length | JSON header | fixed-size records
+
+Each record holds a float64 wall-clock timestamp, the predicted label index
+(-1 when unknown), confidence in hundredths of a percent and the 33x4 landmark
+array quantised to int16 with the scale stored in the header. A record is 276
+bytes, so an hour at 30 fps is roughly 30 MB.
+"""
+import json
+import os
+import struct
+import threading
+import time
+from queue import Queue, Empty, Full
+
+import numpy as np
+
+MAGIC = b"YLMK"
+FORMAT_VERSION = 1
+NUM_LANDMARKS = 33
+CHANNELS = 4  # x, y, z, visibility
+QUANT_SCALE = 8192  # int16 covers +-4.0 in normalised units at ~1e-4 resolution
+
+RECORD_DTYPE = np.dtype([
+    ('timestamp', '<f8'),
+    ('label', 'i1'),
+    ('reserved', 'u1'),
+    ('confidence', '<u2'),
+    ('landmarks', '<i2', (NUM_LANDMARKS, CHANNELS))
+])
+
+
+def quantize(landmarks, scale=QUANT_SCALE):
+    values = np.asarray(landmarks, dtype=np.float32).reshape(NUM_LANDMARKS, CHANNELS) * scale
+    return np.clip(np.rint(values), -32768, 32767).astype(np.int16)
+
+
+def dequantize(quantized, scale=QUANT_SCALE):
+    return quantized.astype(np.float32) / scale
+
+
+def _read_header(f):
+    prefix = f.read(8)
+    if len(prefix) < 8 or prefix[:4] != MAGIC:
+        raise ValueError("Not a landmark recording")
+    (header_length,) = struct.unpack("<I", prefix[4:])
+    return json.loads(f.read(header_length).decode("utf-8")), 8 + header_length
+
+
+class LandmarkRecorder:
+    """Streams landmark frames to disk from a background thread.
+
+    `record()` never blocks the video loop; if the writer falls more than
+    `queue_size` frames behind, new frames are dropped and counted.
+    """
+
+    def __init__(self, path, labels=(), queue_size=1024, flush_interval=1.0):
+        self.path = path
+        self.labels = list(labels)
+        self.queue = Queue(maxsize=queue_size)
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.recorded = 0
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._write_loop, name="landmark-recorder", daemon=True)
+
+    def start(self):
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            with open(self.path, "rb") as f:
+                header, _ = _read_header(f)
+            self.labels = header['labels']
+        else:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            header = json.dumps({
+                'version': FORMAT_VERSION,
+                'num_landmarks': NUM_LANDMARKS,
+                'channels': CHANNELS,
+                'scale': QUANT_SCALE,
+                'labels': self.labels,
+                'created': time.time()
+            }).encode("utf-8")
+            with open(self.path, "wb") as f:
+                f.write(MAGIC + struct.pack("<I", len(header)) + header)
+
+        self.thread.start()
+        return self
+
+    def record(self, landmarks, timestamp=None, label=None, confidence=None):
+        record = np.zeros((), dtype=RECORD_DTYPE)
+        record['timestamp'] = time.time() if timestamp is None else timestamp
+        record['label'] = self.labels.index(label) if label in self.labels else -1
+        record['confidence'] = 0 if confidence is None else int(round(confidence * 100))
+        record['landmarks'] = quantize(landmarks)
+        try:
+            self.queue.put_nowait(record)
+        except Full:
+            self.dropped += 1
+
+    def close(self):
+        self.stop_event.set()
+        if self.thread.is_alive():
+            self.thread.join()
+
+    def _write_loop(self):
+        with open(self.path, "ab") as f:
+            last_flush = time.monotonic()
+            while not (self.stop_event.is_set() and self.queue.empty()):
+                batch = []
+                try:
+                    batch.append(self.queue.get(timeout=0.1))
+                    while True:
+                        batch.append(self.queue.get_nowait())
+                except Empty:
+                    pass
+
+                if batch:
+                    f.write(np.array(batch, dtype=RECORD_DTYPE).tobytes())
+                    self.recorded += len(batch)
+                if time.monotonic() - last_flush >= self.flush_interval:
+                    f.flush()
+                    last_flush = time.monotonic()
+
+
+class LandmarkReader:
+    """Memory-mapped random access to a landmark recording"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.header, offset = _read_header(f)
+        self.labels = self.header['labels']
+        self.scale = self.header['scale']
+
+        # Ignore a trailing partial record left by an interrupted writer
+        count = (os.path.getsize(path) - offset) // RECORD_DTYPE.itemsize
+        self.records = (np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=offset, shape=(count,))
+                        if count else np.zeros(0, dtype=RECORD_DTYPE))
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def timestamps(self):
+        return self.records['timestamp']
+
+    @property
+    def duration(self):
+        return float(self.timestamps[-1] - self.timestamps[0]) if len(self) else 0.0
+
+    def landmarks(self, index):
+        """Return dequantised (33, 4) landmarks, or (N, 33, 4) for a slice"""
+        return dequantize(self.records['landmarks'][index], self.scale)
+
+    def label(self, index):
+        label = int(self.records['label'][index])
+        return self.labels[label] if label >= 0 else None
+
+    def confidence(self, index):
+        return self.records['confidence'][index] / 100
+
+    def index_at(self, timestamp):
+        """Index of the last frame recorded at or before timestamp"""
+        return max(int(np.searchsorted(self.timestamps, timestamp, side="right")) - 1, 0)
+
+    def between(self, start_time, end_time):
+        """Slice of frames with start_time <= timestamp < end_time"""
+        timestamps = self.timestamps
+        return slice(int(np.searchsorted(timestamps, start_time, side="left")),
+                     int(np.searchsorted(timestamps, end_time, side="left")))
+
+    def frame(self, index):
+        return {
+            'timestamp': float(self.timestamps[index]),
+            'label': self.label(index),
+            'confidence': float(self.confidence(index)),
+            'landmarks': self.landmarks(index)
+        }
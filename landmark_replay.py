@@ -0,0 +1,172 @@
+# landmark_replay.py
+"""Deterministic replay of recorded landmark streams through the analysis stages.
+
+Runs the classifier, biomechanical feedback and muscle overlay on frames from a
+LandmarkReader recording, with no camera and no pose detection. Reports
+throughput and, given a golden run, the frames whose outputs changed.
+
+Example:
+    python landmark_replay.py data/recordings/20250101_0900.ylm --model model.h5 \\
+        --backend numpy --golden golden/tree.json
+"""
+import argparse
+import json
+import time
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+from landmark_recorder import LandmarkReader
+from pose_classifier import PoseClassifier
+from posture_corrector import get_biomechanical_feedback
+from emg_visualizer import draw_muscle_overlay
+
+# Stand-in for MediaPipe's NormalizedLandmark, enough for the feedback and overlay code
+LandmarkPoint = namedtuple("LandmarkPoint", ["x", "y", "z", "visibility"])
+
+
+def to_landmark_points(landmarks):
+    return [LandmarkPoint(*map(float, row)) for row in landmarks]
+
+
+class ReplayEngine:
+    def __init__(self, reader, classifier=None, target_pose=None, video_path=None,
+                 frame_size=(720, 1280), draw_overlay=True, realtime=False):
+        self.reader = reader
+        self.classifier = classifier
+        self.target_pose = target_pose
+        self.video_path = video_path
+        self.frame_size = frame_size
+        self.draw_overlay = draw_overlay
+        self.realtime = realtime
+
+    def _frames(self):
+        """Yield the background image for each recorded frame"""
+        if self.video_path:
+            cap = cv2.VideoCapture(self.video_path)
+            try:
+                while True:
+                    ret, frame = cap.read()
+                    if not ret:
+                        return
+                    yield cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            finally:
+                cap.release()
+        else:
+            blank = np.zeros((*self.frame_size, 3), dtype=np.uint8)
+            while True:
+                # The overlay draws in place, so each frame needs its own buffer
+                yield blank.copy()
+
+    def run(self):
+        outputs = []
+        timestamps = self.reader.timestamps
+        frames = self._frames()
+        start = time.perf_counter()
+
+        for index in range(len(self.reader)):
+            if self.realtime:
+                delay = (timestamps[index] - timestamps[0]) - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+
+            frame = next(frames, None)
+            if frame is None:
+                break
+            landmarks = self.reader.landmarks(index)
+            points = to_landmark_points(landmarks)
+
+            label, confidence = self.reader.label(index), float(self.reader.confidence(index))
+            if self.classifier:
+                label, confidence = self.classifier.classify(landmarks.ravel())
+
+            target = self.target_pose or label
+            feedback = get_biomechanical_feedback(points, target) if target else []
+
+            overlay_mean = None
+            if self.draw_overlay and target:
+                overlay = draw_muscle_overlay(frame, landmarks, target)
+                overlay_mean = [round(float(v), 3) for v in overlay.reshape(-1, 3).mean(axis=0)]
+
+            outputs.append({
+                'index': index,
+                'label': label,
+                'confidence': round(confidence, 3),
+                'feedback': feedback,
+                'overlay_mean': overlay_mean
+            })
+
+        elapsed = time.perf_counter() - start
+        return {
+            'frames': len(outputs),
+            'elapsed_s': round(elapsed, 4),
+            'fps': round(len(outputs) / elapsed, 1) if elapsed > 0 else 0.0,
+            'recorded_fps': round((len(self.reader) - 1) / self.reader.duration, 1)
+            if self.reader.duration else 0.0,
+            'outputs': outputs
+        }
+
+
+def diff_outputs(outputs, golden, confidence_tolerance=0.5, overlay_tolerance=0.5):
+    """Return a list of per-frame differences between a run and a golden run"""
+    differences = []
+    if len(outputs) != len(golden):
+        differences.append({'index': None, 'field': 'frames',
+                            'expected': len(golden), 'actual': len(outputs)})
+
+    for actual, expected in zip(outputs, golden):
+        for field in ('label', 'feedback'):
+            if actual[field] != expected[field]:
+                differences.append({'index': actual['index'], 'field': field,
+                                    'expected': expected[field], 'actual': actual[field]})
+
+        if abs(actual['confidence'] - expected['confidence']) > confidence_tolerance:
+            differences.append({'index': actual['index'], 'field': 'confidence',
+                                'expected': expected['confidence'], 'actual': actual['confidence']})
+
+        if (actual['overlay_mean'] is None) != (expected['overlay_mean'] is None) or (
+                actual['overlay_mean'] is not None and
+                np.abs(np.subtract(actual['overlay_mean'], expected['overlay_mean'])).max() > overlay_tolerance):
+            differences.append({'index': actual['index'], 'field': 'overlay_mean',
+                                'expected': expected['overlay_mean'], 'actual': actual['overlay_mean']})
+
+    return differences
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a landmark recording through the analysis stages")
+    parser.add_argument("recording", help="Landmark recording (.ylm)")
+    parser.add_argument("--model", help="Pose classifier .h5 model; recorded labels are used if omitted")
+    parser.add_argument("--backend", default="numpy")
+    parser.add_argument("--target-pose", help="Pose to score against instead of the predicted one")
+    parser.add_argument("--video", help="Recorded video to use as overlay background")
+    parser.add_argument("--realtime", action="store_true", help="Pace frames at recorded timestamps")
+    parser.add_argument("--no-overlay", action="store_true")
+    parser.add_argument("--golden", help="Golden run JSON to compare against")
+    parser.add_argument("--write-golden", action="store_true", help="Write this run as the golden run")
+    args = parser.parse_args()
+
+    classifier = PoseClassifier(args.model, backend=args.backend) if args.model else None
+    engine = ReplayEngine(LandmarkReader(args.recording), classifier, args.target_pose,
+                          args.video, draw_overlay=not args.no_overlay, realtime=args.realtime)
+    report = engine.run()
+    print(f"Replayed {report['frames']} frames in {report['elapsed_s']}s "
+          f"({report['fps']} fps, recorded at {report['recorded_fps']} fps)")
+
+    if args.golden and args.write_golden:
+        with open(args.golden, "w") as f:
+            json.dump(report['outputs'], f)
+        print(f"Wrote golden run to {args.golden}")
+    elif args.golden:
+        with open(args.golden, "r") as f:
+            differences = diff_outputs(report['outputs'], json.load(f))
+        for difference in differences[:20]:
+            print(f"  frame {difference['index']}: {difference['field']} "
+                  f"expected {difference['expected']!r}, got {difference['actual']!r}")
+        print(f"{len(differences)} differences from golden run")
+        raise SystemExit(1 if differences else 0)
+
+
+if __name__ == "__main__":
+    main()
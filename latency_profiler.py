@@ -0,0 +1,92 @@
+# latency_profiler.py
+import csv
+import time
+import threading
+from collections import deque, defaultdict
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+
+
+class LatencyProfiler:
+    """Per-stage timing spans with rolling percentiles and end-to-end FPS.
+
+    Wrap each stage in `with profiler.span("name"):`. Rolling statistics are kept
+    over the last `window` samples per stage, and raw spans are retained (up to
+    `max_spans`) so they can be exported for offline analysis. When disabled,
+    `span()` returns a no-op context manager.
+    """
+
+    def __init__(self, window=300, max_spans=100000, enabled=True):
+        self.window = window
+        self.enabled = enabled
+        self.samples = defaultdict(lambda: deque(maxlen=self.window))
+        self.spans = deque(maxlen=max_spans)
+        self.frame_times = deque(maxlen=window)
+        self.lock = threading.Lock()
+
+    def span(self, stage):
+        if not self.enabled:
+            return nullcontext()
+        return self._timed(stage)
+
+    @contextmanager
+    def _timed(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, start, time.perf_counter() - start)
+
+    def record(self, stage, start, duration):
+        duration_ms = duration * 1000
+        with self.lock:
+            self.samples[stage].append(duration_ms)
+            self.spans.append((threading.current_thread().name, stage,
+                               time.time() - (time.perf_counter() - start), duration_ms))
+
+    def mark_frame(self):
+        """Call once per completed frame to track end-to-end throughput"""
+        if self.enabled:
+            with self.lock:
+                self.frame_times.append(time.perf_counter())
+
+    def fps(self):
+        with self.lock:
+            if len(self.frame_times) < 2:
+                return 0.0
+            elapsed = self.frame_times[-1] - self.frame_times[0]
+            return (len(self.frame_times) - 1) / elapsed if elapsed > 0 else 0.0
+
+    def stage_stats(self):
+        """Return {stage: {'p50', 'p95', 'p99', 'count'}} in milliseconds"""
+        with self.lock:
+            snapshot = {stage: np.array(values) for stage, values in self.samples.items() if values}
+
+        stats = {}
+        for stage, values in snapshot.items():
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            stats[stage] = {
+                'p50': round(float(p50), 2),
+                'p95': round(float(p95), 2),
+                'p99': round(float(p99), 2),
+                'count': len(values)
+            }
+        return stats
+
+    def export_spans(self, path):
+        """Write raw spans as CSV (thread, stage, wall-clock start, duration in ms)"""
+        with self.lock:
+            spans = list(self.spans)
+
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(['thread', 'stage', 'start', 'duration_ms'])
+            writer.writerows(spans)
+        return len(spans)
+
+    def reset(self):
+        with self.lock:
+            self.samples.clear()
+            self.spans.clear()
+            self.frame_times.clear()
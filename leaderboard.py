@@ -0,0 +1,203 @@
+# leaderboard.py
+import math
+import random
+import sqlite3
+import threading
+from pathlib import Path
+
+
+class _End:
+    """Sentinel that sorts after every key"""
+
+    def __lt__(self, other):
+        return False
+
+    def __le__(self, other):
+        return False
+
+
+END = _End()
+
+
+class _Node:
+    __slots__ = ('key', 'next', 'width')
+
+    def __init__(self, key, next, width):
+        self.key = key
+        self.next = next
+        self.width = width
+
+
+class IndexableSkipList:
+    """Sorted multiset with O(log n) expected insert, remove, rank and index lookup.
+
+    Each link stores how many elements it skips, so the position of a key is
+    the sum of the widths followed while searching for it.
+    """
+
+    MAX_LEVELS = 32
+
+    def __init__(self):
+        self.size = 0
+        self.end = _Node(END, [], [])
+        self.head = _Node('HEAD', [self.end] * self.MAX_LEVELS, [1] * self.MAX_LEVELS)
+
+    def __len__(self):
+        return self.size
+
+    def insert(self, key):
+        chain = [None] * self.MAX_LEVELS
+        steps_at_level = [0] * self.MAX_LEVELS
+        node = self.head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level].key <= key:
+                steps_at_level[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+
+        levels = min(self.MAX_LEVELS, 1 - int(math.log(1.0 - random.random(), 2.0)))
+        new_node = _Node(key, [None] * levels, [None] * levels)
+        steps = 0
+        for level in range(levels):
+            previous = chain[level]
+            new_node.next[level] = previous.next[level]
+            previous.next[level] = new_node
+            new_node.width[level] = previous.width[level] - steps
+            previous.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(levels, self.MAX_LEVELS):
+            chain[level].width[level] += 1
+        self.size += 1
+
+    def remove(self, key):
+        chain = [None] * self.MAX_LEVELS
+        node = self.head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level].key < key:
+                node = node.next[level]
+            chain[level] = node
+
+        target = chain[0].next[0]
+        if target is self.end or target.key != key:
+            raise KeyError(key)
+        for level in range(len(target.next)):
+            previous = chain[level]
+            previous.width[level] += target.width[level] - 1
+            previous.next[level] = target.next[level]
+        for level in range(len(target.next), self.MAX_LEVELS):
+            chain[level].width[level] -= 1
+        self.size -= 1
+
+    def rank(self, key):
+        """Number of elements strictly less than key"""
+        count = 0
+        node = self.head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level].key < key:
+                count += node.width[level]
+                node = node.next[level]
+        return count
+
+    def first(self, count):
+        keys = []
+        node = self.head.next[0]
+        while node is not self.end and len(keys) < count:
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+
+class Leaderboard:
+    """Users ranked by (level, points), persisted in SQLite and indexed in memory.
+
+    Upserts write one row and move one skip-list entry, so ranks and top-k
+    never require re-sorting the board. Users tied on level and points share a
+    rank. Changes made by other processes are picked up through SQLite's
+    data_version and a per-row sequence number, without reloading the board.
+    """
+
+    def __init__(self, db_path="data/gamification/leaderboard.db"):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(exist_ok=True, parents=True)
+        self.conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS leaderboard (
+                    user TEXT PRIMARY KEY,
+                    level INTEGER NOT NULL,
+                    points INTEGER NOT NULL,
+                    seq INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_leaderboard_score ON leaderboard (level DESC, points DESC);
+                CREATE INDEX IF NOT EXISTS idx_leaderboard_seq ON leaderboard (seq);
+            """)
+
+        self.ranking = IndexableSkipList()
+        self.keys = {}  # user -> key in self.ranking
+        self.seq = 0  # highest row sequence number applied to the in-memory index
+        self.data_version = None
+        with self.lock:
+            self._sync()
+
+    @staticmethod
+    def _key(user, level, points):
+        return (-level, -points, user)
+
+    def _apply(self, user, level, points):
+        key = self._key(user, level, points)
+        old_key = self.keys.get(user)
+        if old_key == key:
+            return
+        if old_key is not None:
+            self.ranking.remove(old_key)
+        self.ranking.insert(key)
+        self.keys[user] = key
+
+    def _sync(self):
+        """Apply rows changed by any connection since the last sync (caller holds the lock)"""
+        data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self.data_version:
+            return
+        self.data_version = data_version
+        rows = self.conn.execute(
+            "SELECT user, level, points, seq FROM leaderboard WHERE seq > ? ORDER BY seq",
+            (self.seq,)).fetchall()
+        for user, level, points, seq in rows:
+            self._apply(user, level, points)
+            self.seq = max(self.seq, seq)
+
+    def upsert(self, user, level, points):
+        with self.lock:
+            with self.conn:
+                (seq,) = self.conn.execute(
+                    "INSERT INTO leaderboard (user, level, points, seq) "
+                    "VALUES (?, ?, ?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM leaderboard)) "
+                    "ON CONFLICT (user) DO UPDATE SET level = excluded.level, "
+                    "points = excluded.points, seq = excluded.seq RETURNING seq",
+                    (user, level, points)).fetchone()
+            # Pick up anything other processes wrote before this upsert
+            self._sync()
+            self._apply(user, level, points)
+            self.seq = max(self.seq, seq)
+
+    def rank(self, user):
+        """1-based rank of user, or None if the user is not on the board"""
+        with self.lock:
+            self._sync()
+            key = self.keys.get(user)
+            if key is None:
+                return None
+            return self.ranking.rank(key[:2]) + 1
+
+    def top(self, count=10):
+        with self.lock:
+            self._sync()
+            return [{"user": user, "level": -level, "points": -points}
+                    for level, points, user in self.ranking.first(count)]
+
+    def __len__(self):
+        with self.lock:
+            self._sync()
+            return len(self.ranking)
@@ -0,0 +1,188 @@
+# log_compaction.py
+"""Rolls the old part of append-only CSV/JSONL logs into month-partitioned Parquet.
+
+The log file itself stays a small hot tail that is cheap to append to and to
+re-read. Older records move into zstd Parquet files under
+`<cold_dir>/month=YYYY-MM/`, and `<cold_dir>/_manifest.json` lists them. The
+manifest's version changes on every compaction, which tells readers that the
+hot file was rewritten.
+
+Compaction holds the log's FileLock, so it never races AppendLog writers in
+any process. The ordering is:
+1. write the cold files;
+2. publish the manifest;
+3. replace the hot file with its tail.
+A crash between steps 2 and 3 can therefore duplicate records but never lose
+them.
+"""
+import csv
+import io
+import json
+import os
+import threading
+import time
+import uuid
+
+import pandas as pd
+
+from append_log import FileLock
+
+MANIFEST_NAME = "_manifest.json"
+
+
+def read_manifest(cold_dir):
+    try:
+        with open(os.path.join(cold_dir, MANIFEST_NAME), "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {'version': 0, 'parts': []}
+
+
+def manifest_version(cold_dir):
+    """Cheap change marker for the cold segments (one stat call)"""
+    try:
+        stat = os.stat(os.path.join(cold_dir, MANIFEST_NAME))
+        return stat.st_size, stat.st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _write_manifest(cold_dir, manifest):
+    path = os.path.join(cold_dir, MANIFEST_NAME)
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(temp_path, path)
+
+
+def _replace_with_retry(source, target, attempts=50):
+    # Windows refuses to replace a file another process has open; those
+    # handles are short-lived, so wait for them to go away
+    for attempt in range(attempts):
+        try:
+            os.replace(source, target)
+            return
+        except PermissionError:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(0.1)
+
+
+def _split_records(path):
+    """(header, records, raw text of each record) for a CSV or JSONL log"""
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        text = f.read()
+
+    if path.endswith(".jsonl"):
+        lines = [line for line in text.splitlines(keepends=True) if line.strip()]
+        return None, [json.loads(line) for line in lines], lines
+
+    rows = list(csv.reader(io.StringIO(text, newline="")))
+    if not rows:
+        return None, [], []
+    header, rows = rows[0], rows[1:]
+    records = [dict(zip(header, row)) for row in rows if len(row) == len(header)]
+    return header, records, None
+
+
+def compact_log(path, cold_dir, time_column='timestamp', hot_rows=500, convert=None):
+    """Move all but the newest `hot_rows` records of a log into cold Parquet files.
+
+    `convert` may turn the DataFrame of moved records (all strings for CSV)
+    into its stored types. Returns the number of records moved.
+    """
+    with FileLock(path):
+        if not os.path.exists(path):
+            return 0
+        header, records, lines = _split_records(path)
+        if len(records) <= hot_rows:
+            return 0
+
+        split = len(records) - hot_rows
+        cold = pd.DataFrame(records[:split])
+        if convert is not None:
+            cold = convert(cold)
+        months = pd.to_datetime(cold[time_column], errors='coerce').dt.strftime("%Y-%m").fillna("unknown")
+
+        manifest = read_manifest(cold_dir)
+        batch = f"{time.strftime('%Y%m%d_%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        for month, part in cold.groupby(months):
+            relative = os.path.join(f"month={month}", f"part-{batch}.parquet")
+            target = os.path.join(cold_dir, relative)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            part.to_parquet(f"{target}.tmp", index=False, compression='zstd')
+            os.replace(f"{target}.tmp", target)
+            manifest['parts'].append(relative)
+        manifest['version'] += 1
+        _write_manifest(cold_dir, manifest)
+
+        temp_path = f"{path}.compacting"
+        with open(temp_path, "w", newline="", encoding="utf-8") as f:
+            if lines is not None:
+                f.writelines(lines[split:])
+            else:
+                writer = csv.writer(f, lineterminator="\n")
+                writer.writerow(header)
+                writer.writerows([record[column] for column in header] for record in records[split:])
+        _replace_with_retry(temp_path, path)
+        return split
+
+
+def read_cold(cold_dir, columns=None, filters=None):
+    """Read the cold segments listed in the manifest into one DataFrame"""
+    parts = [os.path.join(cold_dir, part) for part in read_manifest(cold_dir)['parts']]
+    if not parts:
+        return pd.DataFrame(columns=columns)
+    return pd.read_parquet(parts, columns=columns, filters=filters)
+
+
+class LogCompactor:
+    """Background thread that compacts a log whenever its hot file outgrows `max_hot_bytes`"""
+
+    def __init__(self, path, cold_dir, interval=600, max_hot_bytes=1 << 20, **compact_options):
+        self.path = path
+        self.cold_dir = cold_dir
+        self.interval = interval
+        self.max_hot_bytes = max_hot_bytes
+        self.compact_options = compact_options
+        self.error = None
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, name=f"compact-{os.path.basename(path)}", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread.join(timeout=5.0)
+
+    def compact_if_needed(self):
+        try:
+            if os.path.getsize(self.path) < self.max_hot_bytes:
+                return 0
+        except FileNotFoundError:
+            return 0
+        return compact_log(self.path, self.cold_dir, **self.compact_options)
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            try:
+                self.compact_if_needed()
+                self.error = None
+            except Exception as e:
+                self.error = f"Compaction failed: {str(e)}"
+            self.stop_event.wait(self.interval)
+
+
+_compactors = {}
+_compactors_lock = threading.Lock()
+
+
+def start_compactor(path, cold_dir, **options):
+    """Start (once per process) a background compactor for `path`"""
+    key = os.path.abspath(path)
+    with _compactors_lock:
+        if key not in _compactors:
+            _compactors[key] = LogCompactor(path, cold_dir, **options).start()
+        return _compactors[key]
@@ -0,0 +1,268 @@
+# pose_classifier.py
+import os
+import time
+import argparse
+import numpy as np
+
+LABELS = ["downdog", "goddess", "plank", "tree", "warrior2"]
+POSE_DISPLAY_NAMES = ["Downward Dog", "Goddess", "Plank", "Tree", "Warrior II"]
+NUM_FEATURES = 132  # 33 landmarks x (x, y, z, visibility)
+
+
+# ====================== BACKENDS ======================
+# Heavy runtimes are imported inside each backend so that selecting the NumPy
+# path never pulls TensorFlow into the process.
+
+class KerasBackend:
+    """Calls the Keras model directly instead of going through model.predict()"""
+    name = "keras"
+
+    def __init__(self, model_path):
+        from tensorflow.keras.models import load_model
+        self.model = load_model(model_path)
+
+    def predict(self, landmarks):
+        return np.asarray(self.model(landmarks, training=False))[0]
+
+
+class TFLiteBackend:
+    """Runs an exported .tflite model through the TFLite interpreter"""
+    name = "tflite"
+
+    def __init__(self, model_path):
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            from tensorflow.lite import Interpreter
+
+        self.interpreter = Interpreter(model_path=_exported_path(model_path, ".tflite"))
+        self.interpreter.allocate_tensors()
+        self.input_index = self.interpreter.get_input_details()[0]['index']
+        self.output_index = self.interpreter.get_output_details()[0]['index']
+
+    def predict(self, landmarks):
+        self.interpreter.set_tensor(self.input_index, landmarks)
+        self.interpreter.invoke()
+        return self.interpreter.get_tensor(self.output_index)[0]
+
+
+class ONNXBackend:
+    """Runs an exported .onnx model through ONNX Runtime"""
+    name = "onnx"
+
+    def __init__(self, model_path):
+        import onnxruntime as ort
+        self.session = ort.InferenceSession(_exported_path(model_path, ".onnx"),
+                                            providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict(self, landmarks):
+        return self.session.run(None, {self.input_name: landmarks})[0][0]
+
+
+class NumpyBackend:
+    """Pure NumPy forward pass over weights exported from the .h5 model"""
+    name = "numpy"
+
+    ACTIVATIONS = {
+        'linear': lambda x: x,
+        'relu': lambda x: np.maximum(x, 0),
+        'sigmoid': lambda x: 1 / (1 + np.exp(-x)),
+        'tanh': np.tanh,
+        'softmax': lambda x: _softmax(x)
+    }
+
+    def __init__(self, model_path):
+        weights = np.load(_exported_path(model_path, ".npz"))
+        self.layers = []
+        for i in range(int(weights['num_layers'])):
+            activation = str(weights[f'activation_{i}'])
+            if activation not in self.ACTIVATIONS:
+                raise ValueError(f"Unsupported activation: {activation}")
+            self.layers.append((weights[f'kernel_{i}'],
+                                weights[f'bias_{i}'],
+                                self.ACTIVATIONS[activation]))
+
+    def predict(self, landmarks):
+        x = landmarks
+        for kernel, bias, activation in self.layers:
+            # 1-D kernels are folded batch-norm layers (elementwise scale)
+            x = activation((x @ kernel if kernel.ndim == 2 else x * kernel) + bias)
+        return x[0]
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (KerasBackend, TFLiteBackend, ONNXBackend, NumpyBackend)
+}
+
+
+def _softmax(x):
+    e = np.exp(x - x.max(axis=-1, keepdims=True))
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+def _exported_path(model_path, extension):
+    path = os.path.splitext(model_path)[0] + extension
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            f"{path} not found; export it first with "
+            f"`python pose_classifier.py export {model_path}`"
+        )
+    return path
+
+
+def extract_landmarks(results):
+    if results.pose_landmarks:
+        return np.array([[lm.x, lm.y, lm.z, lm.visibility]
+                         for lm in results.pose_landmarks.landmark]).flatten()
+    return np.zeros(NUM_FEATURES)
+
+
+class PoseClassifier:
+    """Backend-agnostic classifier over a flattened landmark vector"""
+
+    def __init__(self, model_path, backend="keras"):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown inference backend '{backend}', "
+                             f"choose from {', '.join(BACKENDS)}")
+        self.backend = BACKENDS[backend](model_path)
+
+    def predict(self, landmarks):
+        """Return class probabilities for a (132,) or (1, 132) landmark vector"""
+        landmarks = np.ascontiguousarray(landmarks, dtype=np.float32).reshape(1, NUM_FEATURES)
+        return self.backend.predict(landmarks)
+
+    def classify(self, landmarks):
+        """Return (label, confidence %) for a landmark vector"""
+        probabilities = self.predict(landmarks)
+        index = int(np.argmax(probabilities))
+        return LABELS[index], float(probabilities[index]) * 100
+
+
+# ====================== EXPORT ======================
+def export_numpy_weights(model_path):
+    from tensorflow.keras.models import load_model
+    model = load_model(model_path)
+
+    arrays = {}
+    count = 0
+    for layer in model.layers:
+        kind = layer.__class__.__name__
+        if kind in ('InputLayer', 'Dropout', 'Flatten'):
+            continue
+        if kind == 'Dense':
+            kernel, bias = layer.get_weights()
+            activation = layer.get_config()['activation']
+        elif kind == 'BatchNormalization':
+            gamma, beta, mean, variance = layer.get_weights()
+            kernel = gamma / np.sqrt(variance + layer.epsilon)
+            bias = beta - mean * kernel
+            activation = 'linear'
+        else:
+            raise ValueError(f"Cannot export layer type {kind} to NumPy")
+
+        arrays[f'kernel_{count}'] = kernel.astype(np.float32)
+        arrays[f'bias_{count}'] = bias.astype(np.float32)
+        arrays[f'activation_{count}'] = np.array(activation)
+        count += 1
+
+    out_path = os.path.splitext(model_path)[0] + ".npz"
+    np.savez(out_path, num_layers=count, **arrays)
+    return out_path
+
+
+def export_tflite(model_path):
+    import tensorflow as tf
+    model = tf.keras.models.load_model(model_path)
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+
+    out_path = os.path.splitext(model_path)[0] + ".tflite"
+    with open(out_path, "wb") as f:
+        f.write(converter.convert())
+    return out_path
+
+
+def export_onnx(model_path):
+    import tensorflow as tf
+    import tf2onnx
+    model = tf.keras.models.load_model(model_path)
+    spec = (tf.TensorSpec((None, NUM_FEATURES), tf.float32, name="landmarks"),)
+
+    out_path = os.path.splitext(model_path)[0] + ".onnx"
+    tf2onnx.convert.from_keras(model, input_signature=spec, output_path=out_path)
+    return out_path
+
+
+EXPORTERS = {
+    'numpy': export_numpy_weights,
+    'tflite': export_tflite,
+    'onnx': export_onnx
+}
+
+
+# ====================== BENCHMARK ======================
+def benchmark_backends(model_path, backends=None, iterations=1000, warmup=20):
+    """Time single-sample inference for each backend, in milliseconds"""
+    sample = np.random.default_rng(0).random((1, NUM_FEATURES), dtype=np.float32)
+    results = {}
+
+    for name in backends or BACKENDS:
+        try:
+            classifier = PoseClassifier(model_path, backend=name)
+        except Exception as e:
+            results[name] = {'error': str(e)}
+            continue
+
+        for _ in range(warmup):
+            classifier.predict(sample)
+
+        timings = np.empty(iterations)
+        for i in range(iterations):
+            start = time.perf_counter()
+            classifier.predict(sample)
+            timings[i] = time.perf_counter() - start
+
+        timings *= 1000
+        results[name] = {
+            'mean_ms': round(float(timings.mean()), 4),
+            'p50_ms': round(float(np.percentile(timings, 50)), 4),
+            'p95_ms': round(float(np.percentile(timings, 95)), 4)
+        }
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export and benchmark pose classifier backends")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Export the .h5 model for other backends")
+    export_parser.add_argument("model_path")
+    export_parser.add_argument("--formats", nargs="+", choices=list(EXPORTERS),
+                               default=list(EXPORTERS))
+
+    bench_parser = subparsers.add_parser("benchmark", help="Compare inference backends")
+    bench_parser.add_argument("model_path")
+    bench_parser.add_argument("--backends", nargs="+", choices=list(BACKENDS))
+    bench_parser.add_argument("--iterations", type=int, default=1000)
+
+    args = parser.parse_args()
+    if args.command == "export":
+        for fmt in args.formats:
+            try:
+                print(f"{fmt}: {EXPORTERS[fmt](args.model_path)}")
+            except Exception as e:
+                print(f"{fmt}: export failed ({str(e)})")
+    else:
+        results = benchmark_backends(args.model_path, args.backends, args.iterations)
+        for name, stats in results.items():
+            if 'error' in stats:
+                print(f"{name:>8}: unavailable ({stats['error']})")
+            else:
+                print(f"{name:>8}: mean {stats['mean_ms']:.4f} ms  "
+                      f"p50 {stats['p50_ms']:.4f} ms  p95 {stats['p95_ms']:.4f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,24 @@
 import math
+import numpy as np
 import mediapipe as mp
 
-# Biomechanical alignment standards for yoga poses
+# Biomechanical alignment standards for yoga poses.
+# "joints" names the (a, b, c) landmarks of each angle without a side prefix; every
+# rule is checked on both body sides. Rules listed in "either_side" describe one
+# limb of an asymmetric pose (e.g. the front knee) and pass if either side is in
+# range. Rules listed in "raised_leg" / "standing_leg" are checked only on the
+# side whose ankle is higher / lower in the image. All others must hold on every
+# visible side.
 POSE_BIOMECHANICS = {
     "downdog": {
         "angles": {
             "hip": (160, 180),
             "shoulder": (170, 190)
         },
+        "joints": {
+            "hip": ("SHOULDER", "HIP", "KNEE"),
+            "shoulder": ("WRIST", "SHOULDER", "HIP")
+        },
         "feedback": {
             "hip": "Lift hips higher and straighten legs",
             "shoulder": "Press chest towards thighs"
@@ -18,6 +29,11 @@ POSE_BIOMECHANICS = {
             "front_knee": (80, 100),
             "back_hip": (160, 180)
         },
+        "joints": {
+            "front_knee": ("HIP", "KNEE", "ANKLE"),
+            "back_hip": ("SHOULDER", "HIP", "KNEE")
+        },
+        "either_side": ["front_knee", "back_hip"],
         "feedback": {
             "front_knee": "Align front knee over ankle",
             "back_hip": "Rotate back hip forward"
@@ -25,9 +41,15 @@ POSE_BIOMECHANICS = {
     },
     "tree": {
         "angles": {
-            "raised_knee": (160, 180),
+            "raised_knee": (0, 90),
             "standing_hip": (170, 190)
         },
+        "joints": {
+            "raised_knee": ("HIP", "KNEE", "ANKLE"),
+            "standing_hip": ("SHOULDER", "HIP", "KNEE")
+        },
+        "raised_leg": ["raised_knee"],
+        "standing_leg": ["standing_hip"],
         "feedback": {
             "raised_knee": "Bring knee out to the side",
             "standing_hip": "Engage core and square hips"
@@ -38,13 +60,35 @@ POSE_BIOMECHANICS = {
             "shoulder": (170, 190),
             "hip": (170, 190)
         },
+        "joints": {
+            "shoulder": ("HIP", "SHOULDER", "WRIST"),
+            "hip": ("SHOULDER", "HIP", "ANKLE")
+        },
         "feedback": {
             "shoulder": "Keep shoulders over wrists",
             "hip": "Maintain straight line from head to heels"
         }
+    },
+    "goddess": {
+        "angles": {
+            "knee": (80, 120),
+            "elbow": (70, 110)
+        },
+        "joints": {
+            "knee": ("HIP", "KNEE", "ANKLE"),
+            "elbow": ("SHOULDER", "ELBOW", "WRIST")
+        },
+        "feedback": {
+            "knee": "Sink lower and track knees over toes",
+            "elbow": "Bend elbows to 90 degrees in cactus arms"
+        }
     }
 }
 
+# Landmarks below this visibility are ignored when checking rules
+MIN_VISIBILITY = 0.5
+MAX_FEEDBACK = 2
+
 
 def calculate_joint_angle(a, b, c):
     """Calculate the joint angle formed by three landmarks"""
@@ -53,46 +97,136 @@ def calculate_joint_angle(a, b, c):
     return angle_degrees if angle_degrees <= 180 else 360 - angle_degrees
 
 
-def get_biomechanical_feedback(landmarks, target_pose):
-    """Generate posture correction feedback based on joint angles"""
-    feedback = []
-    target_pose = target_pose.lower()
+# Joint angles measured at the middle landmark of each (a, b, c) MediaPipe index triplet
+JOINT_TRIPLETS = {
+    "left_elbow": (11, 13, 15),
+    "right_elbow": (12, 14, 16),
+    "left_shoulder": (13, 11, 23),
+    "right_shoulder": (14, 12, 24),
+    "left_hip": (11, 23, 25),
+    "right_hip": (12, 24, 26),
+    "left_knee": (23, 25, 27),
+    "right_knee": (24, 26, 28),
+    "left_ankle": (25, 27, 31),
+    "right_ankle": (26, 28, 32)
+}
+JOINT_NAMES = list(JOINT_TRIPLETS)
+JOINT_INDICES = np.array(list(JOINT_TRIPLETS.values()))
 
-    if target_pose not in POSE_BIOMECHANICS:
-        return feedback
 
-    pose_rules = POSE_BIOMECHANICS[target_pose]
-    mp_pose = mp.solutions.pose.PoseLandmark
+def landmarks_to_array(landmarks):
+    """Convert MediaPipe landmarks (or a flat 132 vector) to a (33, 4) array"""
+    if isinstance(landmarks, np.ndarray):
+        return landmarks.reshape(-1, 33, 4) if landmarks.ndim == 3 else landmarks.reshape(33, 4)
+    return np.array([[lm.x, lm.y, lm.z, lm.visibility] for lm in landmarks])
 
-    try:
-        left_shoulder = landmarks[mp_pose.LEFT_SHOULDER]
-        left_hip = landmarks[mp_pose.LEFT_HIP]
-        left_knee = landmarks[mp_pose.LEFT_KNEE]
-        left_ankle = landmarks[mp_pose.LEFT_ANKLE]
-
-        if target_pose == "downdog":
-            hip_angle = calculate_joint_angle(left_shoulder, left_hip, left_knee)
-            if not pose_rules["angles"]["hip"][0] <= hip_angle <= pose_rules["angles"]["hip"][1]:
-                feedback.append(pose_rules["feedback"]["hip"])
-
-        elif target_pose == "warrior2":
-            front_knee_angle = calculate_joint_angle(left_hip, left_knee, left_ankle)
-            if not pose_rules["angles"]["front_knee"][0] <= front_knee_angle <= pose_rules["angles"]["front_knee"][1]:
-                feedback.append(pose_rules["feedback"]["front_knee"])
-
-        elif target_pose == "tree":
-            raised_knee_angle = calculate_joint_angle(left_hip, left_knee, left_ankle)
-            if not pose_rules["angles"]["raised_knee"][0] <= raised_knee_angle <= pose_rules["angles"]["raised_knee"][
-                1]:
-                feedback.append(pose_rules["feedback"]["raised_knee"])
-
-        elif target_pose == "plank":
-            shoulder_angle = calculate_joint_angle(left_hip, left_shoulder,
-                                                   landmarks[mp_pose.LEFT_WRIST])
-            if not pose_rules["angles"]["shoulder"][0] <= shoulder_angle <= pose_rules["angles"]["shoulder"][1]:
-                feedback.append(pose_rules["feedback"]["shoulder"])
 
+def compute_joint_angles(landmarks, use_3d=False, min_visibility=None):
+    """Compute every joint angle in JOINT_TRIPLETS in one vectorized pass.
+
+    Accepts a (33, 4) landmark array or an (N, 33, 4) batch and returns angles in
+    degrees with shape (len(JOINT_NAMES),) or (N, len(JOINT_NAMES)). In 2D the
+    result matches calculate_joint_angle. With `min_visibility`, angles whose
+    three landmarks are not all at least that visible are NaN.
+    """
+    return triplet_angles(landmarks, JOINT_INDICES, use_3d, min_visibility)
+
+
+def triplet_angles(landmarks, indices, use_3d=False, min_visibility=None):
+    """Angles at the middle landmark of each triplet in an (..., 3) index array"""
+    landmarks = np.asarray(landmarks, dtype=np.float64)
+    dims = 3 if use_3d else 2
+    a = landmarks[..., indices[..., 0], :dims]
+    b = landmarks[..., indices[..., 1], :dims]
+    c = landmarks[..., indices[..., 2], :dims]
+    ba, bc = a - b, c - b
+
+    dot = np.sum(ba * bc, axis=-1)
+    if use_3d:
+        cross = np.linalg.norm(np.cross(ba, bc), axis=-1)
+    else:
+        cross = np.abs(ba[..., 0] * bc[..., 1] - ba[..., 1] * bc[..., 0])
+    angles = np.degrees(np.arctan2(cross, dot))
+
+    if min_visibility is not None:
+        visibility = landmarks[..., indices, 3].min(axis=-1)
+        angles = np.where(visibility >= min_visibility, angles, np.nan)
+    return angles
+
+
+def joint_angles_by_name(landmarks, use_3d=False, min_visibility=None):
+    """Single-frame convenience wrapper returning {joint_name: angle}"""
+    angles = compute_joint_angles(landmarks_to_array(landmarks), use_3d, min_visibility)
+    return dict(zip(JOINT_NAMES, angles.tolist()))
+
+
+class CompiledRules:
+    """Index and threshold arrays for all rules of one pose, both sides stacked"""
+
+    def __init__(self, pose_rules):
+        landmark = mp.solutions.pose.PoseLandmark
+        names = list(pose_rules["angles"])
+        either_side = set(pose_rules.get("either_side", []))
+
+        # indices has shape (2, rules, 3): row 0 is the left side, row 1 the mirrored right side
+        self.indices = np.array([
+            [[landmark[f"{side}_{part}"] for part in pose_rules["joints"][name]] for name in names]
+            for side in ("LEFT", "RIGHT")
+        ])
+        self.low = np.array([pose_rules["angles"][name][0] for name in names], dtype=np.float64)
+        self.high = np.array([pose_rules["angles"][name][1] for name in names], dtype=np.float64)
+        self.either_side = np.array([name in either_side for name in names])
+        self.raised_leg = np.array([name in pose_rules.get("raised_leg", []) for name in names])
+        self.standing_leg = np.array([name in pose_rules.get("standing_leg", []) for name in names])
+        self.ankles = [landmark.LEFT_ANKLE, landmark.RIGHT_ANKLE]
+        self.messages = [pose_rules["feedback"][name] for name in names]
+
+    def _applicable_sides(self, landmarks):
+        """(2, rules) mask of the body sides each rule is checked on"""
+        applies = np.ones(self.indices.shape[:2], dtype=bool)
+        if not (self.raised_leg.any() or self.standing_leg.any()):
+            return applies
+
+        ankles = landmarks[self.ankles]
+        if (ankles[:, 3] < MIN_VISIBILITY).any():
+            # Without both ankles the raised leg is unknown, so skip leg-specific rules
+            applies[:, self.raised_leg | self.standing_leg] = False
+            return applies
+
+        # Image y grows downwards: the raised foot has the smaller y
+        raised = int(np.argmin(ankles[:, 1]))
+        applies[1 - raised, self.raised_leg] = False
+        applies[raised, self.standing_leg] = False
+        return applies
+
+    def failed_rules(self, landmarks):
+        """Boolean mask of rules violated by a (33, 4) landmark array"""
+        angles = triplet_angles(landmarks, self.indices, min_visibility=MIN_VISIBILITY)
+        known = ~np.isnan(angles) & self._applicable_sides(landmarks)
+        in_range = known & (angles >= self.low) & (angles <= self.high)
+        out_of_range = known & ~in_range
+        return np.where(self.either_side,
+                        known.any(axis=0) & ~in_range.any(axis=0),
+                        out_of_range.any(axis=0))
+
+
+def compile_rules(table):
+    return {pose: CompiledRules(pose_rules) for pose, pose_rules in table.items()}
+
+
+COMPILED_RULES = compile_rules(POSE_BIOMECHANICS)
+
+
+def get_biomechanical_feedback(landmarks, target_pose):
+    """Generate posture correction feedback based on joint angles"""
+    rules = COMPILED_RULES.get(target_pose.lower())
+    if rules is None:
+        return []
+
+    try:
+        failed = rules.failed_rules(landmarks_to_array(landmarks))
     except Exception as e:
         print(f"Error in biomechanical analysis: {str(e)}")
+        return []
 
-    return feedback[:2]
\ No newline at end of file
+    return [rules.messages[i] for i in np.flatnonzero(failed)][:MAX_FEEDBACK]
@@ -1,58 +1,402 @@
+import time
+import threading
+import weakref
+from collections import namedtuple
+from queue import Queue, Empty, Full
+
 import cv2
 import numpy as np
-import heartpy as hp
-from collections import deque
+from scipy.signal import butter, sosfilt, sosfilt_zi
 from cvzone.FaceDetectionModule import FaceDetector
 
 
+class StreamingHeartRateEstimator:
+    """Incremental PPG heart-rate estimate from irregularly timed samples.
+
+    Frames do not arrive at a fixed rate, so each raw sample is stored with its
+    capture timestamp and linearly resampled onto a uniform `sample_rate` grid.
+    Grid samples go through a stateful IIR bandpass (filter state is carried
+    between calls, so nothing is re-filtered) into a fixed NumPy ring buffer.
+    The BPM and a signal-quality index are re-estimated from the buffer's
+    spectrum only every `estimate_interval` seconds instead of on every frame.
+    A gap longer than `max_gap` seconds (e.g. the face was lost) restarts the
+    stream, since interpolating across it would corrupt the spectrum.
+    """
+
+    def __init__(self, sample_rate=30, buffer_size=300, band=(0.7, 2.5),
+                 estimate_interval=1.0, valid_range=(40, 180), max_gap=1.0):
+        self.sample_rate = sample_rate
+        self.buffer_size = buffer_size
+        self.band = band
+        self.estimate_every = max(1, int(round(estimate_interval * sample_rate)))
+        self.valid_range = valid_range
+        self.max_gap = max_gap
+
+        self.sos = butter(2, band, btype='bandpass', fs=sample_rate, output='sos')
+        self.buffer = np.zeros(buffer_size)
+        self.raw_times = np.zeros(buffer_size)
+        self.bpm = None
+        self.quality = 0.0
+        self.estimates = 0  # number of valid estimates made so far
+        self.reset()
+
+        # Frequency grid (zero-padded for finer BPM resolution) and the band of interest
+        self.n_fft = 1 << int(np.ceil(np.log2(buffer_size * 4)))
+        freqs = np.fft.rfftfreq(self.n_fft, d=1 / sample_rate)
+        self.band_mask = (freqs >= band[0]) & (freqs <= band[1])
+        self.band_freqs = freqs[self.band_mask]
+        self.window = np.hanning(buffer_size)
+
+    def add_sample(self, value, timestamp=None):
+        """Add a raw sample captured at `timestamp` seconds (nominal spacing if omitted)"""
+        if timestamp is None:
+            timestamp = 0.0 if self.last_time is None else self.last_time + 1 / self.sample_rate
+
+        if self.last_time is not None and timestamp - self.last_time > self.max_gap:
+            self._restart()
+        elif self.last_time is not None and timestamp <= self.last_time:
+            return
+
+        self.raw_times[self.raw_position] = timestamp
+        self.raw_position = (self.raw_position + 1) % self.buffer_size
+        self.raw_count = min(self.raw_count + 1, self.buffer_size)
+
+        if self.last_time is None:
+            self.next_grid_time = timestamp
+            self.last_time, self.last_value = timestamp, value
+
+        # Emit every grid point up to this sample, interpolated from the previous one
+        span = timestamp - self.last_time
+        step = 1 / self.sample_rate
+        while self.next_grid_time <= timestamp:
+            fraction = (self.next_grid_time - self.last_time) / span if span > 0 else 1.0
+            self._push_uniform(self.last_value + fraction * (value - self.last_value))
+            self.next_grid_time += step
+        self.last_time, self.last_value = timestamp, value
+
+    def _push_uniform(self, value):
+        if self.zi is None:
+            # Start the filter in steady state for the first value to avoid a large transient
+            self.zi = sosfilt_zi(self.sos) * value
+        filtered, self.zi = sosfilt(self.sos, [value], zi=self.zi)
+
+        self.buffer[self.position] = filtered[0]
+        self.position = (self.position + 1) % self.buffer_size
+        self.count = min(self.count + 1, self.buffer_size)
+        self.since_estimate += 1
+
+    @property
+    def ready(self):
+        return self.count == self.buffer_size
+
+    @property
+    def measured_rate(self):
+        """Actual raw sampling rate in Hz over the recent samples"""
+        if self.raw_count < 2:
+            return 0.0
+        times = np.roll(self.raw_times, -self.raw_position)[-self.raw_count:]
+        elapsed = times[-1] - times[0]
+        return (self.raw_count - 1) / elapsed if elapsed > 0 else 0.0
+
+    def signal(self):
+        """Filtered, uniformly resampled samples in chronological order"""
+        return np.roll(self.buffer, -self.position)[-self.count:]
+
+    def estimate(self, force=False):
+        """Return the latest BPM, recomputing it only when the cadence is due"""
+        if not self.ready or (self.since_estimate < self.estimate_every and not force):
+            return self.bpm
+
+        self.since_estimate = 0
+        samples = self.signal()
+        spectrum = np.abs(np.fft.rfft((samples - samples.mean()) * self.window, n=self.n_fft))
+        power = spectrum[self.band_mask] ** 2
+        peak = int(np.argmax(power))
+        peak_freq = self.band_freqs[peak]
+
+        # Share of in-band power within 0.1 Hz (6 BPM) of the peak: ~1 for a clean pulse
+        near_peak = np.abs(self.band_freqs - peak_freq) <= 0.1
+        total = power.sum()
+        self.quality = float(power[near_peak].sum() / total) if total > 0 else 0.0
+
+        bpm = float(peak_freq * 60)
+        if self.valid_range[0] < bpm < self.valid_range[1]:
+            self.bpm = bpm
+            self.estimates += 1
+        return self.bpm
+
+    def _restart(self):
+        """Drop the buffered signal but keep the last published estimate"""
+        self.zi = None
+        self.buffer[:] = 0
+        self.position = 0
+        self.count = 0
+        self.since_estimate = 0
+        self.raw_position = 0
+        self.raw_count = 0
+        self.last_time = None
+        self.last_value = None
+        self.next_grid_time = None
+
+    def reset(self):
+        self._restart()
+        self.bpm = None
+        self.quality = 0.0
+
+
+HeartRateReading = namedtuple("HeartRateReading", ["bpm", "quality", "measured_rate", "estimates"])
+
+
+class HeartRateWorker:
+    """Runs PPG estimation on a background thread so the video path never waits on it.
+
+    Samples arrive through a bounded queue (dropped, not blocked on, when full).
+    The worker publishes its latest reading as one immutable tuple, so readers
+    get a consistent snapshot without taking a lock. Every fresh estimate is
+    also appended to `session_readings` for session-level averages. An
+    estimation failure is kept in `error` and the stream restarts, rather than
+    ending the thread.
+    """
+
+    def __init__(self, estimator, queue_size=256):
+        self.estimator = estimator
+        self.samples = Queue(maxsize=queue_size)
+        self.latest = HeartRateReading(None, 0.0, 0.0, 0)
+        self.session_readings = []
+        self.dropped = 0
+        self.error = None
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="heart-rate", daemon=True)
+        self.thread.start()
+
+    def submit(self, value, timestamp):
+        try:
+            self.samples.put_nowait((value, timestamp))
+        except Full:
+            self.dropped += 1
+
+    def start_session(self):
+        self.session_readings = []
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread.join(timeout=1.0)
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            batch = []
+            try:
+                batch.append(self.samples.get(timeout=0.1))
+                while True:
+                    batch.append(self.samples.get_nowait())
+            except Empty:
+                if not batch:
+                    continue
+
+            try:
+                for value, timestamp in batch:
+                    self.estimator.add_sample(value, timestamp)
+
+                estimates = self.estimator.estimates
+                bpm = self.estimator.estimate()
+                if self.estimator.estimates > estimates:
+                    self.session_readings.append(bpm)
+                    self.error = None
+                self.latest = HeartRateReading(bpm, self.estimator.quality,
+                                               self.estimator.measured_rate, self.estimator.estimates)
+            except Exception as e:
+                self.error = f"Heart rate estimation failed: {str(e)}"
+                self.estimator.reset()
+
+
+# Measurement regions as (left, top, right, bottom) fractions of the face bounding box
+FACE_ROIS = {
+    'forehead': (0.30, 0.08, 0.70, 0.25),
+    'left_cheek': (0.15, 0.55, 0.35, 0.75),
+    'right_cheek': (0.65, 0.55, 0.85, 0.75)
+}
+
+
+def roi_means(channel, rois):
+    """Mean of each (x1, y1, x2, y2) region of a 2-D array via one integral image.
+
+    The integral image is built only over the bounding box of all regions, after
+    which every region mean costs four lookups regardless of its size.
+    """
+    rois = np.asarray(rois)
+    x0, y0 = rois[:, 0].min(), rois[:, 1].min()
+    x1, y1 = rois[:, 2].max(), rois[:, 3].max()
+    integral = cv2.integral(np.ascontiguousarray(channel[y0:y1, x0:x1]))
+
+    left, top = rois[:, 0] - x0, rois[:, 1] - y0
+    right, bottom = rois[:, 2] - x0, rois[:, 3] - y0
+    sums = (integral[bottom, right] - integral[top, right]
+            - integral[bottom, left] + integral[top, left])
+    areas = (right - left) * (bottom - top)
+    return sums / areas, areas
+
+
+class FaceTracker:
+    """Follows a face box between detections by template matching.
+
+    The face is matched at a reduced scale (about `template_width` pixels
+    wide) inside a window around its last position, so each update costs a
+    small grayscale crop and one matchTemplate call.
+    """
+
+    def __init__(self, template_width=40, search_margin=0.5, min_score=0.6):
+        self.template_width = template_width
+        self.search_margin = search_margin
+        self.min_score = min_score
+        self.template = None
+        self.scale = 1.0
+
+    def _gray_crop(self, frame, x1, y1, x2, y2):
+        crop = cv2.resize(frame[y1:y2, x1:x2], None, fx=self.scale, fy=self.scale,
+                          interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(crop, cv2.COLOR_RGB2GRAY)
+
+    def init(self, frame, bbox):
+        height, width = frame.shape[:2]
+        x, y, w, h = bbox
+        x1, y1, x2, y2 = max(x, 0), max(y, 0), min(x + w, width), min(y + h, height)
+        if x2 - x1 < 8 or y2 - y1 < 8:
+            self.template = None
+            return
+        self.scale = min(1.0, self.template_width / (x2 - x1))
+        self.template = self._gray_crop(frame, x1, y1, x2, y2)
+        self.offset = (x1 - x, y1 - y)  # template corner relative to the box corner
+
+    def update(self, frame, bbox):
+        """New (x, y, w, h) for the face, or None if it could not be found near bbox"""
+        if self.template is None:
+            return None
+        height, width = frame.shape[:2]
+        x, y, w, h = bbox
+        margin_x, margin_y = int(w * self.search_margin), int(h * self.search_margin)
+        x1, y1 = max(x - margin_x, 0), max(y - margin_y, 0)
+        x2, y2 = min(x + w + margin_x, width), min(y + h + margin_y, height)
+
+        window = self._gray_crop(frame, x1, y1, x2, y2)
+        if window.shape[0] < self.template.shape[0] or window.shape[1] < self.template.shape[1]:
+            return None
+        scores = cv2.matchTemplate(window, self.template, cv2.TM_CCOEFF_NORMED)
+        _, score, _, (dx, dy) = cv2.minMaxLoc(scores)
+        if score < self.min_score:
+            return None
+        return (int(x1 + dx / self.scale) - self.offset[0], int(y1 + dy / self.scale) - self.offset[1], w, h)
+
+
 class HeartRateMonitor:
-    def __init__(self):
+    def __init__(self, detect_interval=10, max_missed_detections=3):
         self.detector = FaceDetector()
         self.buffer_size = 300  # Increased buffer for better accuracy
-        self.ppg_signal = deque(maxlen=self.buffer_size)
-        self.sample_rate = 30
-        self.roi = (100, 100, 200, 200)  # Forehead region
+        self.sample_rate = 30  # uniform grid the PPG signal is resampled to
+        self.worker = HeartRateWorker(StreamingHeartRateEstimator(self.sample_rate, self.buffer_size))
+        # Streamlit has no session-end hook; stop the worker once the session's monitor is dropped
+        weakref.finalize(self, self.worker.stop_event.set)
+        self.seen_estimates = 0
+        self.detect_interval = detect_interval
+        self.max_missed_detections = max_missed_detections
+        self.face_bbox = None  # (x, y, w, h) of the tracked face
+        self.tracker = FaceTracker()
+        self.frames_since_detection = 0
+        self.missed_detections = 0
         self.last_hr = 72  # Default resting HR
         self.hr_history = []
 
-    def process_frame(self, frame):
-        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        frame, bboxs = self.detector.findFaces(frame, draw=False)
+    @property
+    def signal_quality(self):
+        return self.worker.latest.quality
+
+    @property
+    def measured_rate(self):
+        return self.worker.latest.measured_rate
+
+    @property
+    def error(self):
+        return self.worker.error
+
+    @property
+    def has_estimate(self):
+        """False until the worker publishes a real estimate; get_heart_rate() shows a default before that"""
+        return self.worker.latest.bpm is not None
+
+    def start_session(self):
+        self.worker.start_session()
+
+    def stop(self):
+        """Stop the estimation thread; the monitor cannot be used afterwards"""
+        self.worker.stop()
+
+    def session_average(self):
+        """Mean BPM over all estimates since start_session(), or None if there were none"""
+        readings = list(self.worker.session_readings)
+        return int(round(np.mean(readings))) if readings else None
 
+    def _track_face(self, frame):
+        """Detect the face every `detect_interval` frames and track it by template matching in between"""
+        if self.face_bbox is not None and self.frames_since_detection < self.detect_interval - 1:
+            tracked = self.tracker.update(frame, self.face_bbox)
+            if tracked is not None:
+                self.frames_since_detection += 1
+                self.face_bbox = tracked
+                return self.face_bbox
+            # Lost track: fall through and re-detect now
+
+        self.frames_since_detection = 0
+        # cvzone converts BGR to RGB internally, so hand it BGR
+        _, bboxs = self.detector.findFaces(cv2.cvtColor(frame, cv2.COLOR_RGB2BGR), draw=False)
         if bboxs:
-            x, y, w, h = self.roi
-            forehead = frame[y:y + h, x:x + w]
-            if forehead.size > 0:
-                # Use green channel for better PPG signal
-                avg_pixel = np.mean(forehead[:, :, 1])
-                self.ppg_signal.append(avg_pixel)
-
-                # Draw forehead ROI for visualization
-                cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
-                cv2.putText(frame, "HR Measurement Zone", (x - 10, y - 10),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+            self.face_bbox = tuple(int(v) for v in bboxs[0]['bbox'])
+            self.tracker.init(frame, self.face_bbox)
+            self.missed_detections = 0
+        elif self.face_bbox is not None:
+            self.missed_detections += 1
+            if self.missed_detections > self.max_missed_detections:
+                self.face_bbox = None
+        return self.face_bbox
+
+    def _face_rois(self, bbox, shape):
+        height, width = shape[:2]
+        x, y, w, h = bbox
+        rois = []
+        for left, top, right, bottom in FACE_ROIS.values():
+            x1 = min(max(int(x + left * w), 0), width - 1)
+            y1 = min(max(int(y + top * h), 0), height - 1)
+            x2 = min(max(int(x + right * w), x1 + 1), width)
+            y2 = min(max(int(y + bottom * h), y1 + 1), height)
+            rois.append((x1, y1, x2, y2))
+        return rois
+
+    def process_frame(self, frame, timestamp=None):
+        """Sample the PPG signal from an RGB frame and draw the measurement zones on it"""
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        bbox = self._track_face(frame)
+
+        if bbox is not None:
+            rois = self._face_rois(bbox, frame.shape)
+            # Use green channel for better PPG signal, area-weighted across regions
+            means, areas = roi_means(frame[:, :, 1], rois)
+            self.worker.submit(float(np.average(means, weights=areas)), timestamp)
+
+            for x1, y1, x2, y2 in rois:
+                cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+            cv2.putText(frame, "HR Measurement Zone", (rois[0][0] - 10, rois[0][1] - 10),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
 
         return frame
 
     def get_heart_rate(self):
-        if len(self.ppg_signal) == self.buffer_size:
-            try:
-                # Process PPG signal
-                filtered = hp.filter_signal(list(self.ppg_signal),
-                                            cutoff=[0.7, 2.5],
-                                            sample_rate=self.sample_rate,
-                                            filtertype='bandpass')
-
-                # Analyze heart rate
-                wd, m = hp.process(filtered, self.sample_rate)
-                if m['bpm'] > 40 and m['bpm'] < 180:  # Valid HR range
-                    self.last_hr = int(m['bpm'])
-                    self.hr_history.append(self.last_hr)
-
-                    # Keep only last 10 readings
-                    if len(self.hr_history) > 10:
-                        self.hr_history.pop(0)
-            except:
-                pass
-
-        return self.last_hr
\ No newline at end of file
+        """Latest BPM published by the worker; never blocks on signal processing"""
+        reading = self.worker.latest
+        if reading.estimates > self.seen_estimates:
+            self.seen_estimates = reading.estimates
+            self.last_hr = int(reading.bpm)
+            self.hr_history.append(self.last_hr)
+
+            # Keep only last 10 readings
+            if len(self.hr_history) > 10:
+                self.hr_history.pop(0)
+
+        return self.last_hr
@@ -0,0 +1,154 @@
+# session_timeseries.py
+"""Per-second time series of a practice session, stored as Parquet.
+
+Frames are folded into one row per second (means of the numeric signals, the
+most frequent label and the processed frame rate). Each session is a
+directory, and every `flush_rows` seconds the buffered rows are written to it
+as a new, complete Parquet part file. A crash therefore loses at most the
+unflushed rows, and readers can skip parts by their time statistics.
+
+Example:
+    table = load_timeseries(glob.glob("data/timeseries/*"),
+                            columns=["session", "t", "heart_rate"], start=60, end=300)
+"""
+import glob
+import os
+import time
+from collections import Counter
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from posture_corrector import compute_joint_angles, landmarks_to_array, JOINT_NAMES
+
+NUMERIC_FIELDS = ['confidence', 'heart_rate', 'hr_quality'] + [f'angle_{joint}' for joint in JOINT_NAMES]
+
+SCHEMA = pa.schema(
+    [('session', pa.dictionary(pa.int32(), pa.string())),
+     ('t', pa.float64()),  # seconds since the session started
+     ('time', pa.timestamp('ms')),
+     ('fps', pa.float32()),
+     ('label', pa.dictionary(pa.int32(), pa.string()))] +
+    [(name, pa.float32()) for name in NUMERIC_FIELDS]
+)
+
+
+class SessionTimeSeries:
+    """Collects per-frame measurements and writes them out as one row per second.
+
+    `path` is the session's directory; its parts are `part-NNNNN.parquet`.
+    """
+
+    def __init__(self, path, session=None, flush_rows=60):
+        self.path = path
+        self.session = session or os.path.basename(os.path.normpath(path))
+        self.flush_rows = flush_rows
+        self.start_time = None
+        self.rows = []
+        self.parts = 0
+        self.written = 0
+        self._reset_bucket(None)
+
+    def _reset_bucket(self, second):
+        self.bucket_second = second
+        self.frames = 0
+        self.labels = Counter()
+        self.sums = np.zeros(len(NUMERIC_FIELDS))
+        self.counts = np.zeros(len(NUMERIC_FIELDS))
+
+    def update(self, timestamp=None, landmarks=None, label=None, confidence=None,
+               heart_rate=None, hr_quality=None):
+        """Add one frame's measurements; missing values are left out of the averages"""
+        timestamp = time.time() if timestamp is None else timestamp
+        if self.start_time is None:
+            self.start_time = timestamp
+
+        second = int(timestamp - self.start_time)
+        if second != self.bucket_second:
+            self._emit_bucket()
+            self._reset_bucket(second)
+
+        values = np.full(len(NUMERIC_FIELDS), np.nan)
+        values[:3] = [np.nan if v is None else v for v in (confidence, heart_rate, hr_quality)]
+        if landmarks is not None:
+            values[3:] = compute_joint_angles(landmarks_to_array(landmarks), min_visibility=0.5)
+        valid = ~np.isnan(values)
+        self.sums[valid] += values[valid]
+        self.counts += valid
+
+        self.frames += 1
+        if label is not None:
+            self.labels[label] += 1
+
+    def _emit_bucket(self):
+        if not self.frames:
+            return
+
+        with np.errstate(invalid='ignore'):
+            means = self.sums / self.counts
+        row = dict(zip(NUMERIC_FIELDS, means.tolist()))
+        row.update({
+            't': float(self.bucket_second),
+            'time': int((self.start_time + self.bucket_second) * 1000),
+            'fps': float(self.frames),
+            'label': self.labels.most_common(1)[0][0] if self.labels else None
+        })
+        self.rows.append(row)
+        if len(self.rows) >= self.flush_rows:
+            self.flush()
+
+    def flush(self):
+        """Write buffered rows as a new part file"""
+        if not self.rows:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        columns = {name: [row[name] for row in self.rows] for name in SCHEMA.names if name != 'session'}
+        columns['session'] = [self.session] * len(self.rows)
+        target = os.path.join(self.path, f"part-{self.parts:05d}.parquet")
+        # Written under a temporary name so readers never see a half-written part
+        pq.write_table(pa.Table.from_pydict(columns, schema=SCHEMA), f"{target}.tmp", compression='zstd')
+        os.replace(f"{target}.tmp", target)
+        self.parts += 1
+        self.written += len(self.rows)
+        self.rows = []
+
+    def close(self):
+        """Write the partial last second and any buffered rows"""
+        self._emit_bucket()
+        self._reset_bucket(None)
+        self.flush()
+
+
+def load_timeseries(paths, columns=None, start=None, end=None, errors=None):
+    """Read selected columns of one or many sessions, limited to t in [start, end).
+
+    `paths` may be session directories or individual Parquet files. Only the
+    requested columns are decoded, and row groups whose time range falls
+    outside [start, end) are skipped using the Parquet statistics. Files that
+    cannot be opened are skipped; pass a list as `errors` to collect them as
+    (path, message) pairs.
+    """
+    files = []
+    for path in ([paths] if isinstance(paths, str) else paths):
+        files.extend(sorted(glob.glob(os.path.join(path, "*.parquet"))) if os.path.isdir(path) else [path])
+
+    readable = []
+    for path in files:
+        try:
+            pq.read_metadata(path)
+        except (OSError, pa.ArrowInvalid) as e:
+            if errors is not None:
+                errors.append((path, str(e)))
+            continue
+        readable.append(path)
+
+    dataset = ds.dataset(readable, schema=SCHEMA, format='parquet')
+    condition = None
+    if start is not None:
+        condition = ds.field('t') >= start
+    if end is not None:
+        upper = ds.field('t') < end
+        condition = upper if condition is None else condition & upper
+    return dataset.to_table(columns=columns, filter=condition)
@@ -1,23 +1,197 @@
 # session_tracker.py
+import sqlite3
+import threading
+from pathlib import Path
+
 import pandas as pd
 
+DEFAULT_USER = 'New User'
+GRANULARITIES = ['day', 'week', 'month']
+ROLLUP_COLUMNS = ['bucket', 'sessions', 'duration', 'calories', 'avg_hr', 'fav_pose']
+HISTORY_COLUMNS = ['date', 'duration', 'poses', 'avg_hr', 'calories', 'form_score',
+                   'longest_hold', 'time_in_range', 'recording', 'timeseries']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user TEXT NOT NULL,
+    date TEXT NOT NULL,
+    duration REAL NOT NULL,
+    poses TEXT NOT NULL,
+    avg_hr INTEGER,
+    calories REAL NOT NULL,
+    form_score REAL,
+    longest_hold REAL,
+    time_in_range REAL,
+    recording TEXT,
+    timeseries TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_user_date ON sessions (user, date);
+CREATE INDEX IF NOT EXISTS idx_sessions_date ON sessions (date);
+
+CREATE TABLE IF NOT EXISTS user_stats (
+    user TEXT PRIMARY KEY,
+    total_sessions INTEGER NOT NULL,
+    total_duration REAL NOT NULL,
+    fav_pose TEXT,
+    fav_count INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS pose_counts (
+    user TEXT NOT NULL,
+    poses TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (user, poses)
+);
+
+CREATE TABLE IF NOT EXISTS rollups (
+    user TEXT NOT NULL,
+    granularity TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    sessions INTEGER NOT NULL,
+    duration REAL NOT NULL,
+    calories REAL NOT NULL,
+    hr_sum REAL NOT NULL,
+    hr_count INTEGER NOT NULL,
+    fav_pose TEXT,
+    fav_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user, granularity, bucket)
+);
+
+CREATE TABLE IF NOT EXISTS rollup_pose_counts (
+    user TEXT NOT NULL,
+    granularity TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    poses TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (user, granularity, bucket, poses)
+);
+"""
+
+
+def bucket_starts(date):
+    """Start date of the day, (Monday-based) week and month containing a session date"""
+    day = pd.Timestamp(date).normalize()
+    return {
+        'day': day.strftime("%Y-%m-%d"),
+        'week': (day - pd.Timedelta(days=day.weekday())).strftime("%Y-%m-%d"),
+        'month': day.strftime("%Y-%m-01")
+    }
+
 
 class SessionTracker:
-    def __init__(self):
-        self.sessions = []
+    """Session history persisted in SQLite, with per-user aggregates kept up to date on insert.
+
+    `get_stats` reads one precomputed row instead of scanning the history, and
+    history is read a page at a time through the (user, date) index. Daily,
+    weekly and monthly rollups are updated in the same transaction as each
+    insert, so charts read at most one row per bucket.
+    """
+
+    def __init__(self, db_path="data/sessions.db"):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(exist_ok=True, parents=True)
+        # Streamlit reruns the script on different threads, so share one
+        # connection and serialise access to it. Other app processes are
+        # handled by SQLite's own locking: WAL lets readers run alongside the
+        # single writer, and writers wait up to `timeout` for each other.
+        self.conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.lock = threading.Lock()
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            has_rollups = self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'rollups'").fetchone()
+            self.conn.executescript(SCHEMA)
+            columns = {row['name'] for row in self.conn.execute("PRAGMA table_info(sessions)")}
+            if 'timeseries' not in columns:
+                self.conn.execute("ALTER TABLE sessions ADD COLUMN timeseries TEXT")
+            if not has_rollups:
+                self._backfill_rollups()
 
-    def add_session(self, duration, poses, avg_hr=None):
+    def add_session(self, duration, poses, avg_hr=None, recording=None,
+                    form_score=None, longest_hold=None, time_in_range=None, timeseries=None,
+                    user=DEFAULT_USER):
         session = {
-            'date': pd.Timestamp.now().strftime("%Y-%m-%d %H:%M"),
+            'user': user,
+            'date': pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
             'duration': round(float(duration), 1),
             'poses': ', '.join(poses),
             'avg_hr': avg_hr,
-            'calories': self._estimate_calories(duration)
+            'calories': self._estimate_calories(duration),
+            'form_score': form_score,
+            'longest_hold': longest_hold,
+            'time_in_range': time_in_range,
+            'recording': recording,
+            'timeseries': timeseries
         }
-        self.sessions.append(session)
 
-    def get_stats(self):
-        if not self.sessions:
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO sessions (user, date, duration, poses, avg_hr, calories, form_score, "
+                "longest_hold, time_in_range, recording, timeseries) VALUES (:user, :date, :duration, "
+                ":poses, :avg_hr, :calories, :form_score, :longest_hold, :time_in_range, :recording, "
+                ":timeseries)",
+                session)
+            count = self.conn.execute(
+                "INSERT INTO pose_counts (user, poses, count) VALUES (?, ?, 1) "
+                "ON CONFLICT (user, poses) DO UPDATE SET count = count + 1 RETURNING count",
+                (user, session['poses'])).fetchone()[0]
+            # The favourite only changes when this session's poses overtake it;
+            # ties go to the alphabetically first, as pandas' mode() did
+            self.conn.execute(
+                "INSERT INTO user_stats (user, total_sessions, total_duration, fav_pose, fav_count) "
+                "VALUES (:user, 1, :duration, :poses, :count) "
+                "ON CONFLICT (user) DO UPDATE SET "
+                "total_sessions = total_sessions + 1, "
+                "total_duration = total_duration + excluded.total_duration, "
+                "fav_pose = CASE WHEN excluded.fav_count > fav_count OR "
+                "(excluded.fav_count = fav_count AND excluded.fav_pose < fav_pose) "
+                "THEN excluded.fav_pose ELSE fav_pose END, "
+                "fav_count = MAX(fav_count, excluded.fav_count)",
+                {**session, 'count': count})
+            self._update_rollups(session)
+        return session
+
+    def _update_rollups(self, session):
+        """Fold one session into its day, week and month buckets (caller holds the transaction)"""
+        has_hr = session['avg_hr'] is not None
+        for granularity, bucket in bucket_starts(session['date']).items():
+            key = (session['user'], granularity, bucket)
+            count = self.conn.execute(
+                "INSERT INTO rollup_pose_counts (user, granularity, bucket, poses, count) "
+                "VALUES (?, ?, ?, ?, 1) ON CONFLICT (user, granularity, bucket, poses) "
+                "DO UPDATE SET count = count + 1 RETURNING count",
+                (*key, session['poses'])).fetchone()[0]
+            self.conn.execute(
+                "INSERT INTO rollups (user, granularity, bucket, sessions, duration, calories, "
+                "hr_sum, hr_count, fav_pose, fav_count) VALUES (?, ?, ?, 1, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (user, granularity, bucket) DO UPDATE SET "
+                "sessions = sessions + 1, "
+                "duration = duration + excluded.duration, "
+                "calories = calories + excluded.calories, "
+                "hr_sum = hr_sum + excluded.hr_sum, "
+                "hr_count = hr_count + excluded.hr_count, "
+                "fav_pose = CASE WHEN excluded.fav_count > fav_count OR "
+                "(excluded.fav_count = fav_count AND excluded.fav_pose < fav_pose) "
+                "THEN excluded.fav_pose ELSE fav_pose END, "
+                "fav_count = MAX(fav_count, excluded.fav_count)",
+                (*key, session['duration'], session['calories'],
+                 session['avg_hr'] if has_hr else 0, int(has_hr), session['poses'], count))
+
+    def _backfill_rollups(self):
+        """Build rollups for sessions stored before the rollup tables existed"""
+        rows = self.conn.execute(
+            "SELECT user, date, duration, poses, avg_hr, calories FROM sessions ORDER BY id").fetchall()
+        for row in rows:
+            self._update_rollups(dict(row))
+
+    def get_stats(self, user=DEFAULT_USER):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT total_sessions, total_duration, fav_pose FROM user_stats WHERE user = ?",
+                (user,)).fetchone()
+        if row is None:
             return {
                 'total_sessions': 0,
                 'total_duration': 0.0,
@@ -25,16 +199,79 @@ class SessionTracker:
                 'fav_pose': 'N/A'
             }
 
-        df = pd.DataFrame(self.sessions)
         return {
-            'total_sessions': len(df),
-            'total_duration': round(df['duration'].sum(), 1),
-            'avg_duration': round(df['duration'].mean(), 1),
-            'fav_pose': df['poses'].mode()[0] if not df['poses'].empty else 'N/A'
+            'total_sessions': row['total_sessions'],
+            'total_duration': round(row['total_duration'], 1),
+            'avg_duration': round(row['total_duration'] / row['total_sessions'], 1),
+            'fav_pose': row['fav_pose']
         }
 
     def _estimate_calories(self, duration):
         return round(float(duration) * 3, 1)  # 3 kcal/min estimation
 
-    def get_history_df(self):
-        return pd.DataFrame(self.sessions) if self.sessions else pd.DataFrame()
\ No newline at end of file
+    def get_history_df(self, user=DEFAULT_USER, page=0, page_size=50, start=None, end=None):
+        """One page of sessions, newest first, optionally limited to dates in [start, end)"""
+        query = f"SELECT {', '.join(HISTORY_COLUMNS)} FROM sessions WHERE user = ?"
+        params = [user]
+        if start is not None:
+            query += " AND date >= ?"
+            params.append(str(start))
+        if end is not None:
+            query += " AND date < ?"
+            params.append(str(end))
+        query += " ORDER BY date DESC, id DESC LIMIT ? OFFSET ?"
+        params += [page_size, page * page_size]
+
+        with self.lock:
+            rows = self.conn.execute(query, params).fetchall()
+        return pd.DataFrame([dict(row) for row in rows], columns=HISTORY_COLUMNS) if rows else pd.DataFrame()
+
+    def get_rollup_df(self, user=DEFAULT_USER, granularity='day', start=None, end=None):
+        """Per-bucket totals in chronological order, optionally limited to buckets in [start, end)"""
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity '{granularity}', expected one of {GRANULARITIES}")
+        query = ("SELECT bucket, sessions, duration, calories, "
+                 "CASE WHEN hr_count > 0 THEN hr_sum / hr_count END AS avg_hr, fav_pose "
+                 "FROM rollups WHERE user = ? AND granularity = ?")
+        params = [user, granularity]
+        if start is not None:
+            query += " AND bucket >= ?"
+            params.append(str(start))
+        if end is not None:
+            query += " AND bucket < ?"
+            params.append(str(end))
+        query += " ORDER BY bucket"
+
+        with self.lock:
+            rows = self.conn.execute(query, params).fetchall()
+        df = pd.DataFrame([dict(row) for row in rows], columns=ROLLUP_COLUMNS)
+        df['bucket'] = pd.to_datetime(df['bucket'])
+        return df
+
+    def pick_granularity(self, user=DEFAULT_USER, max_points=60):
+        """Finest bucket size that covers the user's whole history in at most max_points buckets"""
+        with self.lock:
+            first, last = self.conn.execute(
+                "SELECT MIN(date), MAX(date) FROM sessions WHERE user = ?", (user,)).fetchone()
+        if first is None:
+            return 'day'
+
+        days = (pd.Timestamp(last).normalize() - pd.Timestamp(first).normalize()).days + 1
+        if days <= max_points:
+            return 'day'
+        if days / 7 <= max_points:
+            return 'week'
+        return 'month'
+
+    def get_chart_df(self, user=DEFAULT_USER, max_points=60):
+        """Rollups at the granularity picked for the user's history, plus that granularity"""
+        granularity = self.pick_granularity(user, max_points)
+        return self.get_rollup_df(user, granularity), granularity
+
+    def count_pages(self, user=DEFAULT_USER, page_size=50):
+        total = self.get_stats(user)['total_sessions']
+        return max(1, -(-total // page_size))
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
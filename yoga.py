@@ -1,20 +1,30 @@
 import streamlit as st
 import cv2
 import mediapipe as mp
-import numpy as np
+import os
+import time
 from datetime import datetime
-from tensorflow.keras.models import load_model
 from streamlit_option_menu import option_menu
 from yoga_pose_library import integrate_pose_library
 from ai_recommendation import get_ai_recommendation, show_recommendation_ui
 from yoga_nidra import show_yoga_nidra_interface
-from posture_corrector import get_biomechanical_feedback
 from ppg_processor import HeartRateMonitor
-from emg_visualizer import draw_muscle_overlay
 from user_profile import UserProfile
 from session_tracker import SessionTracker
 from feedback_system import FeedbackSystem, show_feedback_ui
 from team import show_team_page
+from frame_pipeline import FramePipeline
+from detection_scheduler import DetectionScheduler
+from latency_profiler import LatencyProfiler
+from landmark_recorder import LandmarkRecorder
+from hold_stability import HoldTracker
+from hud import HudCompositor
+from session_timeseries import SessionTimeSeries
+from inference_resolution import (RESOLUTION_CHOICES, auto_pick_resolution, load_device_resolution,
+                                  save_device_resolution)
+from pose_classifier import PoseClassifier, LABELS, POSE_DISPLAY_NAMES
+import frame_annotator
+from streamlit.runtime.scriptrunner import add_script_run_ctx
 
 # ====================== APP CONFIGURATION ======================
 st.set_page_config(
@@ -37,113 +47,58 @@ if 'hr_monitor' not in st.session_state:
         'user_profile': UserProfile().load_profile(),
         'session_tracker': SessionTracker(),
         'session_start': None,
+        'pipelined_capture': True,
+        'adaptive_detection': True,
+        'detection_scheduler': DetectionScheduler(),
+        'inference_setting': 'Auto',
+        'inference_resolution': None,
+        'profiler': LatencyProfiler(enabled=False),
+        'latency_rendered_at': 0.0,
+        'record_landmarks': False,
+        'landmark_recorder': None,
+        'session_timeseries': None,
+        'hold_tracker': HoldTracker(),
+        'hud': HudCompositor(),
         'feedback_system': FeedbackSystem()
     })
 
 # ====================== POSE DETECTION SETUP ======================
 MODEL_PATH = "C:\\Users\\shaur\\OneDrive\\Desktop\\Abhishekpandey1909-SwasthaVerse-7acaa7a\\Abhishekpandey1909-SwasthaVerse-7acaa7a\\yoga_pose_neural_network_model.h5"
-LABELS = ["downdog", "goddess", "plank", "tree", "warrior2"]
-POSE_DISPLAY_NAMES = ["Downward Dog", "Goddess", "Plank", "Tree", "Warrior II"]
+# keras, tflite, onnx or numpy (see pose_classifier.py for exporting the .h5 model)
+INFERENCE_BACKEND = os.environ.get("YOGA_INFERENCE_BACKEND", "keras")
 
 try:
-    model = load_model(MODEL_PATH)
+    model = PoseClassifier(MODEL_PATH, backend=INFERENCE_BACKEND)
 except Exception as e:
     st.error(f"Failed to load model: {str(e)}")
     model = None
 
 mp_pose = mp.solutions.pose
-mp_drawing = mp.solutions.drawing_utils
 pose = mp_pose.Pose(static_image_mode=False, min_detection_confidence=0.5)
+HISTORY_PAGE_SIZE = 50
 
 # ====================== CORE FUNCTIONS ======================
-def extract_landmarks(results):
-    if results.pose_landmarks:
-        return np.array([[lm.x, lm.y, lm.z, lm.visibility]
-                         for lm in results.pose_landmarks.landmark]).flatten()
-    return np.zeros(132)
-
-def get_pose_feedback(predicted_pose, target_pose, confidence):
-    if confidence < 70:
-        return "No pose detected", (255, 0, 0)
-    elif predicted_pose != target_pose:
-        return f"Adjust to {target_pose}", (255, 165, 0)
-    elif confidence < 85:
-        return "Good form!", (255, 255, 0)
-    else:
-        return "Perfect!", (0, 255, 0)
-
-def process_frame(frame, target_pose):
-    image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    results = pose.process(image)
-    annotated_image = image.copy()
-
-    if st.session_state.show_hr:
-        annotated_image = st.session_state.hr_monitor.process_frame(annotated_image)
-        hr = st.session_state.hr_monitor.get_heart_rate()
-        cv2.putText(annotated_image, f"Heart Rate: {hr} BPM",
-                    (annotated_image.shape[1] - 250, 30),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
-        st.session_state.current_hr = hr
-
-    if results.pose_landmarks:
-        if st.session_state.show_emg:
-            annotated_image = draw_muscle_overlay(
-                annotated_image,
-                results.pose_landmarks.landmark,
-                target_pose.lower(),
-                alpha=st.session_state.emg_opacity
-            )
-
-        mp_drawing.draw_landmarks(
-            annotated_image,
-            results.pose_landmarks,
-            mp_pose.POSE_CONNECTIONS,
-            landmark_drawing_spec=mp_drawing.DrawingSpec(
-                color=(0, 255, 0), thickness=2, circle_radius=2
-            ),
-            connection_drawing_spec=mp_drawing.DrawingSpec(
-                color=(255, 0, 0), thickness=2
-            )
-        )
-
-        landmarks = extract_landmarks(results)
-        if landmarks.sum() != 0 and model:
-            landmarks = landmarks.reshape(1, -1)
-            predictions = model.predict(landmarks, verbose=0)
-            pred_index = np.argmax(predictions)
-            predicted_pose = LABELS[pred_index]
-            confidence = predictions[0][pred_index] * 100
-
-            feedback, color = get_pose_feedback(predicted_pose, target_pose, confidence)
-            biomech_feedback = get_biomechanical_feedback(
-                results.pose_landmarks.landmark,
-                target_pose.lower()
-            )
-
-            y_position = 50
-            for text in [
-                f"Target: {target_pose}",
-                f"Detected: {predicted_pose} ({confidence:.1f}%)",
-                feedback
-            ]:
-                cv2.putText(annotated_image, text, (20, y_position),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 2)
-                y_position += 40
-
-            y_position += 20
-            for correction in biomech_feedback:
-                cv2.putText(annotated_image, "• " + correction, (20, y_position),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 165, 255), 2)
-                y_position += 30
-
-    else:
-        cv2.putText(annotated_image, "No person detected", (20, 50),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 0, 0), 2)
-
-    return annotated_image
+def process_frame(frame, target_pose, captured_at=None):
+    return frame_annotator.process_frame(frame, target_pose, st.session_state, pose, model, captured_at)
+
+def close_session_outputs():
+    """Close the session's landmark recording and time series, returning their paths if written"""
+    recording = None
+    if st.session_state.landmark_recorder:
+        st.session_state.landmark_recorder.close()
+        recording = st.session_state.landmark_recorder.path
+        st.session_state.landmark_recorder = None
+
+    timeseries = None
+    if st.session_state.session_timeseries:
+        st.session_state.session_timeseries.close()
+        if st.session_state.session_timeseries.written:
+            timeseries = st.session_state.session_timeseries.path
+        st.session_state.session_timeseries = None
+    return recording, timeseries
 
 # ====================== STREAMLIT UI ======================
-def home_tab():
+def home_tab(latency_placeholder=None):
     st.header("Real-Time Yoga Pose Correction")
 
     # Pose selection with display names mapped to model labels
@@ -153,20 +108,36 @@ def home_tab():
     col1, col2 = st.columns(2)
     with col1:
         if st.button("Start Webcam Session"):
+            # A session left open (restarted, or never stopped) must not keep its files open
+            close_session_outputs()
             st.session_state.webcam_active = True
             st.session_state.session_start = datetime.now()
+            st.session_state.detection_scheduler.reset()
+            st.session_state.hold_tracker.reset()
+            st.session_state.hr_monitor.start_session()
+            session_stamp = st.session_state.session_start.strftime('%Y%m%d_%H%M%S')
+            st.session_state.session_timeseries = SessionTimeSeries(f"data/timeseries/{session_stamp}")
+            if st.session_state.record_landmarks:
+                recording_path = f"data/recordings/{session_stamp}.ylm"
+                st.session_state.landmark_recorder = LandmarkRecorder(recording_path, labels=LABELS).start()
     with col2:
         if st.button("Stop Webcam Session"):
             if st.session_state.webcam_active:
                 try:
                     session_end = datetime.now()
                     duration = (session_end - st.session_state.session_start).total_seconds() / 60
-                    avg_hr = st.session_state.hr_monitor.get_heart_rate() if st.session_state.show_hr else None
+                    avg_hr = st.session_state.hr_monitor.session_average() if st.session_state.show_hr else None
+
+                    recording, timeseries = close_session_outputs()
 
                     st.session_state.session_tracker.add_session(
                         duration=duration,
                         poses=[target_pose],
-                        avg_hr=avg_hr
+                        avg_hr=avg_hr,
+                        recording=recording,
+                        timeseries=timeseries,
+                        user=st.session_state.user_profile['name'],
+                        **st.session_state.hold_tracker.summary()
                     )
 
                     show_feedback_ui(target_pose)
@@ -176,26 +147,98 @@ def home_tab():
 
             st.session_state.webcam_active = False
 
+    st.checkbox("Pipelined capture (low latency)", key="pipelined_capture")
+    st.checkbox("Adaptive detection (skip work on held poses)", key="adaptive_detection")
+    st.checkbox("Record landmarks for later review", key="record_landmarks")
+    st.selectbox("Inference resolution", ['Auto', 'Full'] + RESOLUTION_CHOICES,
+                 key="inference_setting",
+                 help="Long side in pixels of the image fed to pose detection")
+
     if st.session_state.webcam_active:
         cap = cv2.VideoCapture(0)
         frame_placeholder = st.empty()
 
         try:
-            while cap.isOpened() and st.session_state.webcam_active:
-                ret, frame = cap.read()
-                if not ret:
-                    st.error("Failed to access webcam")
-                    break
-
-                processed_frame = process_frame(frame, target_pose)
-                frame_placeholder.image(processed_frame, channels="RGB")
-
-                if cv2.waitKey(1) & 0xFF == ord('q'):
-                    break
+            st.session_state.inference_resolution = resolve_inference_resolution(cap)
+            if st.session_state.pipelined_capture:
+                run_pipelined_loop(cap, frame_placeholder, target_pose, latency_placeholder)
+            else:
+                run_serial_loop(cap, frame_placeholder, target_pose, latency_placeholder)
         finally:
             cap.release()
             cv2.destroyAllWindows()
 
+def resolve_inference_resolution(cap):
+    setting = st.session_state.inference_setting
+    if setting == 'Full':
+        return None
+    if setting != 'Auto':
+        return setting
+
+    resolution = load_device_resolution()
+    if resolution is None:
+        ret, frame = cap.read()
+        if not ret:
+            return None
+        with st.spinner("Measuring detection speed on this device..."):
+            resolution, timings = auto_pick_resolution(pose.process, frame)
+        save_device_resolution(resolution, timings)
+    return resolution
+
+def render_latency_readout(placeholder, throttle=1.0):
+    profiler = st.session_state.profiler
+    if placeholder is None or not profiler.enabled:
+        return
+
+    now = time.monotonic()
+    if now - st.session_state.latency_rendered_at < throttle:
+        return
+    st.session_state.latency_rendered_at = now
+
+    stats = profiler.stage_stats()
+    with placeholder.container():
+        st.metric("End-to-end FPS", f"{profiler.fps():.1f}")
+        if stats:
+            st.dataframe([{'stage': stage, 'p50 ms': timing['p50'], 'p95 ms': timing['p95'], 'p99 ms': timing['p99']}
+                          for stage, timing in stats.items()], hide_index=True)
+        else:
+            st.info("Latency will appear once webcam starts")
+
+def run_serial_loop(cap, frame_placeholder, target_pose, latency_placeholder=None):
+    while cap.isOpened() and st.session_state.webcam_active:
+        ret, frame = cap.read()
+        captured_at = time.monotonic()
+        if not ret:
+            st.error("Failed to access webcam")
+            break
+
+        processed_frame = process_frame(frame, target_pose, captured_at)
+        frame_placeholder.image(processed_frame, channels="RGB")
+        render_latency_readout(latency_placeholder)
+
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            break
+
+def run_pipelined_loop(cap, frame_placeholder, target_pose, latency_placeholder=None):
+    # Keep the driver from queueing frames behind our back
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    pipeline = FramePipeline(cap, lambda frame, captured_at: process_frame(frame, target_pose, captured_at))
+    for thread in pipeline.threads:
+        add_script_run_ctx(thread)
+
+    pipeline.start()
+    try:
+        while pipeline.running and st.session_state.webcam_active:
+            processed_frame = pipeline.latest_result()
+            if processed_frame is not None:
+                frame_placeholder.image(processed_frame, channels="RGB")
+            render_latency_readout(latency_placeholder)
+    finally:
+        pipeline.stop()
+
+    if pipeline.error:
+        st.error(pipeline.error)
+
 def main():
     st.title("🧘 Swasthaverse - AI Yoga Assistant")
     st.caption("B.Tech Major Project under the guidance of Prof. Shivesh Sharma")
@@ -216,17 +259,23 @@ def main():
         st.divider()
         st.subheader("📈 Progress Tracker")
         tracker = st.session_state.session_tracker
-        stats = tracker.get_stats()
+        user_name = st.session_state.user_profile['name']
+        stats = tracker.get_stats(user_name)
 
         col1, col2 = st.columns(2)
         col1.metric("Total Sessions", stats['total_sessions'])
         col2.metric("Total Duration", f"{stats['total_duration']:.1f} min")
 
         st.write("**Session History**")
-        history_df = tracker.get_history_df()
-        if not history_df.empty:
-            st.line_chart(history_df.set_index('date')['duration'])
+        recent_df = tracker.get_history_df(user_name, page_size=HISTORY_PAGE_SIZE)
+        if not recent_df.empty:
+            chart_df, granularity = tracker.get_chart_df(user_name)
+            st.caption(f"Minutes practised per {granularity}")
+            st.bar_chart(chart_df.set_index('bucket')['duration'])
             with st.expander("View All Sessions"):
+                page = st.number_input("Page", 1, tracker.count_pages(user_name, HISTORY_PAGE_SIZE), 1)
+                history_df = recent_df if page == 1 else tracker.get_history_df(
+                    user_name, page=page - 1, page_size=HISTORY_PAGE_SIZE)
                 st.dataframe(history_df, hide_index=True)
         else:
             st.info("No sessions recorded yet")
@@ -293,6 +342,10 @@ def main():
                 st.metric(label="Heart Rate",
                           value=f"{current_hr} BPM",
                           delta=None if len(hr_history) < 2 else current_hr - hr_history[-2])
+                st.caption(f"Signal quality {st.session_state.get('current_hr_quality', 0.0):.2f} · "
+                           f"sampling at {st.session_state.hr_monitor.measured_rate:.1f} fps")
+                if st.session_state.hr_monitor.error:
+                    st.error(st.session_state.hr_monitor.error)
 
                 if len(hr_history) > 1:
                     st.line_chart(hr_history)
@@ -310,8 +363,23 @@ def main():
             st.markdown("- 🔵 Arm & Shoulder Muscles")
             st.slider("Overlay Opacity", 0.1, 1.0, 0.4, key="emg_opacity")
 
+        # Performance Monitor Section
+        st.divider()
+        st.subheader("⏱️ Performance Monitor")
+        profiler = st.session_state.profiler
+        profiler.enabled = st.checkbox("Show Pipeline Latency")
+        latency_placeholder = st.empty()
+
+        if profiler.enabled:
+            render_latency_readout(latency_placeholder, throttle=0)
+            if st.button("Export Latency Spans"):
+                export_path = f"data/latency_spans_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+                os.makedirs("data", exist_ok=True)
+                count = profiler.export_spans(export_path)
+                st.success(f"Exported {count} spans to {export_path}")
+
     if selected == "Home":
-        home_tab()
+        home_tab(latency_placeholder)
     elif selected == "Pose Library":
         integrate_pose_library()
     elif selected == "Yoga Nidra":